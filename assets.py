@@ -0,0 +1,193 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+# 缓存图片占用内存的上限（字节）
+DEFAULT_BUDGET = 128 * 1024 * 1024
+# 后台解码图片的线程数；pygame 解码和缩放时释放GIL，多个线程可以并行
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+def decode_image(path, size=None):
+    # 在工作线程中执行：只读盘、解码和缩放，不访问显示；失败时返回None
+    try:
+        surface = pygame.image.load(path)
+    except (pygame.error, OSError):
+        return None
+    if size is not None:
+        surface = pygame.transform.scale(surface, size)
+    return surface
+
+
+def convert_for_display(surface):
+    # 转换成显示格式后blit不再需要逐像素转换；没有窗口时保持原格式
+    if pygame.display.get_surface() is None:
+        return surface
+    if surface.get_flags() & pygame.SRCALPHA or surface.get_alpha() is not None:
+        return surface.convert_alpha()
+    return surface.convert()
+
+
+class AssetManager:
+    def __init__(self, budget=DEFAULT_BUDGET, atlas=None):
+        self.budget = budget
+        # 纹理图集中已有预缩放的图片时直接使用图集的子表面
+        self.atlas = atlas
+        # (路径, 尺寸) -> 图片，尺寸为None表示原图；按最近使用顺序排列
+        self.surfaces = OrderedDict()
+        self.missing = set()  # 加载失败的路径，不再重复读盘
+        self.bytes = 0
+        self.disk_loads = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path, size=None):
+        key = (path, tuple(size) if size else None)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        if path in self.missing:
+            return None
+        if self.atlas is not None:
+            sprite = self.atlas.get(path, key[1])
+            if sprite is not None:
+                self.hits += 1
+                return sprite
+
+        self.misses += 1
+        surface = self._load(path, key[1])
+        if surface is not None:
+            self._store(key, surface)
+        return surface
+
+    def available(self, path, size=None):
+        # 已在缓存或图集中，或者已知加载失败，不需要再读盘
+        key = (path, tuple(size) if size else None)
+        if key in self.surfaces or path in self.missing:
+            return True
+        return self.atlas is not None and self.atlas.get(path, key[1]) is not None
+
+    def put(self, path, size, surface):
+        # 放入后台线程解码好的图片，显示格式转换在这里（主线程）完成
+        if surface is None:
+            print(f"无法加载图片: {path}")
+            self.missing.add(path)
+            return
+        self.disk_loads += 1
+        self._store((path, tuple(size) if size else None), convert_for_display(surface))
+
+    def _load(self, path, size=None):
+        # 直接从刚读入的原图缩放，只缓存需要的尺寸；已缓存原图时不再读盘
+        source = self.surfaces.get((path, None))
+        if source is None:
+            try:
+                self.disk_loads += 1
+                source = pygame.image.load(path)
+            except (pygame.error, OSError):
+                print(f"无法加载图片: {path}")
+                self.missing.add(path)
+                return None
+        if size is not None:
+            source = pygame.transform.scale(source, size)
+        return convert_for_display(source)
+
+    def _store(self, key, surface):
+        self.surfaces[key] = surface
+        self.bytes += surface_bytes(surface)
+        # 超出预算时淘汰最久未使用的图片，刚放入的保留
+        while self.bytes > self.budget and len(self.surfaces) > 1:
+            old_key, old_surface = self.surfaces.popitem(last=False)
+            self.bytes -= surface_bytes(old_surface)
+            self.evictions += 1
+
+    def clear(self):
+        self.surfaces.clear()
+        self.missing.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {
+            'entries': len(self.surfaces),
+            'bytes': self.bytes,
+            'disk_loads': self.disk_loads,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class LazyImages:
+    def __init__(self, manager, entries):
+        # 名称 -> (路径, 尺寸)，第一次使用时才加载
+        self.manager = manager
+        self.entries = dict(entries)
+
+    def get(self, name, default=None):
+        entry = self.entries.get(name)
+        if entry is None:
+            return default
+        return self.manager.get(*entry)
+
+    def __getitem__(self, name):
+        return self.manager.get(*self.entries[name])
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def preload(self, names=None):
+        for name in names if names is not None else self.entries:
+            self.get(name)
+
+
+class AssetLoader:
+    # 按分组在线程池中加载图片；主线程每帧调用 poll 取回完成的图片，某个分组全部完成后即可使用
+    def __init__(self, manager, workers=DEFAULT_WORKERS):
+        self.manager = manager
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asset-loader')
+        self.groups = {}   # 分组 -> [(路径, 尺寸)]
+        self.pending = {}  # (路径, 尺寸) -> Future
+        self.done = set()
+
+    def request(self, group, entries):
+        # 按提交顺序解码，先请求的分组先完成
+        keys = self.groups.setdefault(group, [])
+        for path, size in entries:
+            key = (path, tuple(size) if size else None)
+            keys.append(key)
+            if key in self.pending or key in self.done:
+                continue
+            if self.manager.available(*key):
+                self.done.add(key)
+            else:
+                self.pending[key] = self.executor.submit(decode_image, *key)
+
+    def poll(self):
+        # 返回本次完成的图片数量
+        finished = [key for key, future in self.pending.items() if future.done()]
+        for key in finished:
+            self.manager.put(key[0], key[1], self.pending.pop(key).result())
+            self.done.add(key)
+        return len(finished)
+
+    def progress(self, group):
+        keys = self.groups.get(group, ())
+        return sum(key in self.done for key in keys), len(keys)
+
+    def ready(self, group):
+        done, total = self.progress(group)
+        return done == total
+
+    def finished(self):
+        return not self.pending
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
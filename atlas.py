@@ -0,0 +1,147 @@
+# 纹理图集：离线把角色、怪物和卡牌图片按游戏中使用的尺寸缩放后打包成一张图，运行时只加载一次
+import argparse
+import json
+import os
+import sys
+
+import pygame
+
+from layout import CARD_SIZE, CHARACTER_SIZE, MONSTER_SIZE
+
+ATLAS_VERSION = 1
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+ATLAS_IMAGE = 'atlas.png'
+ATLAS_INDEX = 'atlas.json'
+
+# 目录 -> 游戏中使用的尺寸（Character / Monster / Card）
+SPRITE_GROUPS = [
+    ('characters', CHARACTER_SIZE),
+    ('monsters', MONSTER_SIZE),
+    ('cards', CARD_SIZE),
+]
+
+MAX_WIDTH = 1024
+PADDING = 1
+
+
+def sprite_key(path, assets_dir=ASSETS_DIR):
+    # 以相对 assets 目录的路径作为图集中的名称
+    return os.path.relpath(os.path.abspath(path), assets_dir).replace(os.sep, '/')
+
+
+def collect_sprites(assets_dir=ASSETS_DIR, groups=SPRITE_GROUPS):
+    sprites = []
+    for folder, size in groups:
+        directory = os.path.join(assets_dir, folder)
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if filename.lower().endswith('.png'):
+                sprites.append((f"{folder}/{filename}", os.path.join(directory, filename), size))
+    return sprites
+
+
+def pack_shelves(sizes, max_width=MAX_WIDTH, padding=PADDING):
+    # 货架式装箱：按高度从大到小逐行摆放，一行放不下就另起一行
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    positions = [None] * len(sizes)
+    x = y = shelf_height = width = 0
+    for i in order:
+        w, h = sizes[i]
+        if x and x + w > max_width:
+            y += shelf_height + padding
+            x = shelf_height = 0
+        positions[i] = (x, y)
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+        width = max(width, x - padding)
+    return positions, (width, y + shelf_height)
+
+
+def build_atlas(assets_dir=ASSETS_DIR, output_dir=None, groups=SPRITE_GROUPS, max_width=MAX_WIDTH):
+    output_dir = output_dir or assets_dir
+    sprites = collect_sprites(assets_dir, groups)
+    if not sprites:
+        raise ValueError(f"{assets_dir} 中没有可打包的图片")
+
+    images = [pygame.transform.scale(pygame.image.load(path), size) for _, path, size in sprites]
+    positions, sheet_size = pack_shelves([image.get_size() for image in images], max_width)
+
+    sheet = pygame.Surface(sheet_size, pygame.SRCALPHA)
+    sheet.fill((0, 0, 0, 0))
+    index = {}
+    for (key, _, size), image, (x, y) in zip(sprites, images, positions):
+        # 目标区域全透明，取最大值相当于直接复制像素（包括透明度）
+        sheet.blit(image, (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+        index[key] = [x, y, size[0], size[1]]
+
+    os.makedirs(output_dir, exist_ok=True)
+    pygame.image.save(sheet, os.path.join(output_dir, ATLAS_IMAGE))
+    with open(os.path.join(output_dir, ATLAS_INDEX), 'w', encoding='utf-8') as f:
+        json.dump({'version': ATLAS_VERSION, 'image': ATLAS_IMAGE, 'sprites': index},
+                  f, ensure_ascii=False, separators=(',', ':'))
+    return index, sheet_size
+
+
+class TextureAtlas:
+    def __init__(self, index_path, assets_dir=ASSETS_DIR):
+        self.index_path = index_path
+        self.assets_dir = assets_dir
+        self.loaded = False
+        self.sheet = None
+        self.rects = {}
+        self.sprites = {}  # 名称 -> 子表面，与图集共享像素
+
+    def load(self):
+        # 图集只加载一次；没有构建图集时直接退回逐个文件加载
+        if self.loaded:
+            return self.sheet is not None
+        self.loaded = True
+        if not os.path.exists(self.index_path):
+            return False
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') != ATLAS_VERSION:
+                print(f"图集版本不匹配，忽略图集: {self.index_path}")
+                return False
+            sheet = pygame.image.load(os.path.join(os.path.dirname(self.index_path), index['image']))
+        except (OSError, ValueError, KeyError, pygame.error):
+            print(f"无法加载图集: {self.index_path}")
+            return False
+        if pygame.display.get_surface() is not None:
+            sheet = sheet.convert_alpha()
+        self.sheet = sheet
+        self.rects = {key: pygame.Rect(rect) for key, rect in index['sprites'].items()}
+        return True
+
+    def get(self, path, size=None):
+        if not self.load():
+            return None
+        key = sprite_key(path, self.assets_dir)
+        rect = self.rects.get(key)
+        # 图集中只有预缩放的图片，尺寸一致时才使用图集
+        if rect is None or size is None or tuple(size) != rect.size:
+            return None
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.sheet.subsurface(rect)
+            self.sprites[key] = sprite
+        return sprite
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="构建纹理图集")
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('--assets', default=ASSETS_DIR, help="资源目录")
+    parser.add_argument('--output', default=None, help="输出目录，默认与资源目录相同")
+    parser.add_argument('--max-width', type=int, default=MAX_WIDTH)
+    args = parser.parse_args(argv)
+
+    index, size = build_atlas(args.assets, args.output, max_width=args.max_width)
+    print(f"已打包 {len(index)} 张图片，图集尺寸 {size[0]}x{size[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+# 多进程批量模拟：把大量跑局分块交给进程池，每块使用由主种子派生的独立随机数生成器
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from engine import CHARACTERS, GameRules
+from simulate import BUFF_POLICIES, POLICIES, character_index, play_run
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def chunk_seed(master_seed, chunk_index):
+    # 种子只取决于主种子和块编号，与进程数、完成顺序无关
+    digest = hashlib.sha256(f"{master_seed}:{chunk_index}".encode()).digest()
+    return int.from_bytes(digest[:8], 'little')
+
+
+class BatchStats:
+    def __init__(self):
+        self.runs = 0
+        self.kills = 0
+        self.turns = 0
+        self.max_kills = 0
+        self.kill_counts = {}  # 击杀数 -> 局数
+
+    def add(self, result):
+        self.runs += 1
+        self.kills += result.goblins_defeated
+        self.turns += result.turns
+        self.max_kills = max(self.max_kills, result.goblins_defeated)
+        self.kill_counts[result.goblins_defeated] = self.kill_counts.get(result.goblins_defeated, 0) + 1
+
+    def merge(self, other):
+        # 只做求和与取最大值，合并顺序不影响结果
+        self.runs += other.runs
+        self.kills += other.kills
+        self.turns += other.turns
+        self.max_kills = max(self.max_kills, other.max_kills)
+        for kills, count in other.kill_counts.items():
+            self.kill_counts[kills] = self.kill_counts.get(kills, 0) + count
+        return self
+
+    def mean_kills(self):
+        return self.kills / self.runs if self.runs else 0.0
+
+    def as_dict(self):
+        return {
+            'runs': self.runs,
+            'kills': self.kills,
+            'turns': self.turns,
+            'max_kills': self.max_kills,
+            'kill_counts': dict(sorted(self.kill_counts.items())),
+        }
+
+
+def run_chunk(seed, runs, character, policy, buff, max_turns):
+    rules = GameRules(rng=random.Random(seed))
+    index = character_index(character)
+    stats = BatchStats()
+    for _ in range(runs):
+        stats.add(play_run(rules, index, POLICIES[policy], BUFF_POLICIES[buff], max_turns))
+    return stats
+
+
+def iter_chunks(runs, chunk_size, master_seed):
+    for chunk_index, start in enumerate(range(0, runs, chunk_size)):
+        yield chunk_seed(master_seed, chunk_index), min(chunk_size, runs - start)
+
+
+def run_batch(runs, master_seed, character, policy='safe', buff='heal', workers=None,
+              chunk_size=DEFAULT_CHUNK_SIZE, max_turns=1000000, on_chunk=None):
+    workers = workers or os.cpu_count() or 1
+    total = BatchStats()
+    chunks = iter_chunks(runs, chunk_size, master_seed)
+
+    if workers == 1:
+        for seed, count in chunks:
+            total.merge(run_chunk(seed, count, character, policy, buff, max_turns))
+            if on_chunk:
+                on_chunk(total)
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # 同时在途的块数有上限，结果按完成顺序流式合并
+        pending = set()
+        for seed, count in chunks:
+            pending.add(pool.submit(run_chunk, seed, count, character, policy, buff, max_turns))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total.merge(future.result())
+                    if on_chunk:
+                        on_chunk(total)
+        for future in pending:
+            total.merge(future.result())
+            if on_chunk:
+                on_chunk(total)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多进程批量跑局模拟")
+    parser.add_argument('--runs', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0, help="主种子，相同种子在任意进程数下结果一致")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--character', default=CHARACTERS[0][0], choices=[stats[0] for stats in CHARACTERS])
+    parser.add_argument('--policy', default='safe', choices=sorted(POLICIES))
+    parser.add_argument('--buff', default='heal', choices=sorted(BUFF_POLICIES))
+    parser.add_argument('--max-turns', type=int, default=1000000)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    total = run_batch(args.runs, args.seed, args.character, args.policy, args.buff,
+                      args.workers, args.chunk_size, args.max_turns,
+                      on_chunk=lambda stats: print(f"\r已完成 {stats.runs}/{args.runs} 局", end='', file=sys.stderr))
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+
+    print(f"角色: {args.character}  策略: {args.policy}  增益: {args.buff}  种子: {args.seed}")
+    print(f"局数: {total.runs}  平均击杀: {total.mean_kills():.3f}  最多: {total.max_kills}  总回合: {total.turns}")
+    print("击杀分布: " + "  ".join(f"{kills}:{count}" for kills, count in sorted(total.kill_counts.items())))
+    print(f"耗时: {elapsed:.2f}s  ({total.turns / max(elapsed, 1e-9):.0f} 回合/秒)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# 性能基准：在无显示环境下测量绘制和规则的热点路径，保存为JSON基线并与基线比较
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # 没有显示器也能创建窗口
+
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+
+import pygame
+
+from engine import GAME_STATE, GOBLIN_NAME, GameRules
+
+BATTLE = GAME_STATE['BATTLE']
+BUFF_SELECTION = GAME_STATE['BUFF_SELECTION']
+
+BENCH_VERSION = 1
+DEFAULT_BASELINE = 'bench_baseline.json'
+DEFAULT_THRESHOLD = 0.15  # 比基线慢15%以上视为性能退步
+DEFAULT_REPEAT = 5
+
+
+def measure(fn, repeat=DEFAULT_REPEAT):
+    # 自动确定循环次数（每轮至少0.2秒），取多轮中最快一轮的单次耗时，单位微秒
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+
+def rules_turn(rules):
+    # 一个战斗回合：稳健型事件 + 怪物回合；死亡后直接开始新的一局
+    def turn():
+        if rules.game_state == BATTLE:
+            rules.trigger_event('safe')
+            rules.update()
+        elif rules.game_state == BUFF_SELECTION:
+            rules.choose_buff('heal')
+        else:
+            rules.restart()
+            rules.select_character(0)
+    return turn
+
+
+def build_benchmarks():
+    import main
+    from cards import default_registry
+
+    game = main.Game(render_mode='full', seed=1)
+    dirty_game = main.Game(render_mode='dirty', seed=1)
+    for g in (game, dirty_game):
+        g.perform(('select', 0))
+        g.update()
+        g.draw()
+
+    def draw_state(state):
+        def draw():
+            game.game_state = state
+            game.draw()
+        return draw
+
+    benchmarks = {}
+    # 每个界面整屏重绘一帧
+    for name, state in GAME_STATE.items():
+        benchmarks[f'draw.full.{name}'] = draw_state(state)
+    # 脏矩形模式下画面没有变化的一帧
+    benchmarks['draw.dirty_idle.BATTLE'] = dirty_game.draw
+
+    screen = game.screen
+    character = game.characters[0]
+    monster = game.create_monster()
+    card = main.Card(default_registry().get('strike'))
+    goblin_path = main.monster_image_path(GOBLIN_NAME)
+    benchmarks['Character.draw'] = lambda: character.draw(screen, 50, 150)
+    benchmarks['Monster.draw'] = lambda: monster.draw(screen, 500, 100)
+    benchmarks['Card.draw'] = lambda: card.draw(screen, 50, 500)
+    benchmarks['get_font'] = lambda: main.get_font(24)
+    benchmarks['load_image'] = lambda: main.load_image(goblin_path, main.MONSTER_SIZE)
+    benchmarks['create_monster'] = game.create_monster
+
+    rules = GameRules(rng=random.Random(1))
+    rules.select_character(0)
+    benchmarks['rules.turn'] = rules_turn(rules)
+    return benchmarks
+
+
+def run_benchmarks(pattern=None, repeat=DEFAULT_REPEAT):
+    results = {}
+    for name, fn in build_benchmarks().items():
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(fn, repeat)
+        print(f"{name:<28} {results[name]:10.2f} us")
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'machine': platform.machine(),
+        'system': platform.system(),
+    }
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'version': BENCH_VERSION, 'environment': environment(), 'metrics': results},
+                  f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('version') != BENCH_VERSION:
+        raise ValueError(f"不支持的基线版本: {baseline.get('version')}")
+    return baseline
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    # 返回退步的指标：(名称, 基线耗时, 当前耗时, 比值)
+    regressions = []
+    for name, current in results.items():
+        previous = baseline['metrics'].get(name)
+        if previous is None:
+            print(f"{name:<28} 基线中没有该指标")
+            continue
+        ratio = current / previous if previous > 0 else float('inf')
+        flag = "退步" if ratio > 1 + threshold else ("提升" if ratio < 1 - threshold else "")
+        print(f"{name:<28} {previous:10.2f} -> {current:10.2f} us  {ratio:6.2f}x  {flag}")
+        if ratio > 1 + threshold:
+            regressions.append((name, previous, current, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无显示环境下的性能基准")
+    parser.add_argument('--save', metavar='PATH', nargs='?', const=DEFAULT_BASELINE, help="把结果保存为基线")
+    parser.add_argument('--compare', metavar='PATH', nargs='?', const=DEFAULT_BASELINE,
+                        help="与基线比较，有指标退步时返回1")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="允许的变慢比例")
+    parser.add_argument('--filter', default=None, help="只运行名称包含该字符串的基准")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        # 比较前先检查基线，不要在跑完全部基准后才失败
+        try:
+            baseline = load_baseline(args.compare)
+        except FileNotFoundError:
+            print(f"基线文件不存在: {args.compare}，请先用 --save 保存基线")
+            return 1
+        except (OSError, ValueError) as e:
+            print(f"无法读取基线: {args.compare}: {e}")
+            return 1
+    results = run_benchmarks(args.filter, args.repeat)
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"已保存基线: {args.save}")
+    if baseline is not None:
+        print(f"与基线比较（阈值 {args.threshold:.0%}）:")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} 项指标退步")
+            return 1
+        print("没有指标退步")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
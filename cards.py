@@ -0,0 +1,81 @@
+# 卡牌定义注册表：每种卡牌只有一个共享的定义，效果通过预先解析的处理函数结算
+import json
+import os
+
+from engine import EFFECT_HANDLERS
+
+CARDS_VERSION = 1
+CARDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cards.json')
+
+
+class CardDef:
+    __slots__ = ('card_id', 'name', 'attack', 'defense', 'cost', 'card_type',
+                 'effect_id', 'param', 'description', 'handler')
+
+    def __init__(self, card_id, name, attack=0, defense=0, cost=0, card_type="normal",
+                 effect_id='damage', param=None, description=None):
+        if effect_id not in EFFECT_HANDLERS:
+            raise ValueError(f"卡牌 {card_id} 使用了未知的效果: {effect_id}")
+        self.card_id = card_id
+        self.name = name
+        self.attack = attack
+        self.defense = defense
+        self.cost = cost
+        self.card_type = card_type  # normal, skill, buff
+        self.effect_id = effect_id
+        self.param = param
+        self.description = description  # 卡牌效果描述
+        self.handler = EFFECT_HANDLERS[effect_id]
+
+    def __repr__(self):
+        return f"CardDef({self.card_id!r})"
+
+
+class CardRegistry:
+    def __init__(self, definitions=()):
+        self.cards = {}
+        self.by_type = {}
+        for definition in definitions:
+            self.add(definition)
+
+    def add(self, definition):
+        if definition.card_id in self.cards:
+            raise ValueError(f"重复的卡牌ID: {definition.card_id}")
+        self.cards[definition.card_id] = definition
+        self.by_type.setdefault(definition.card_type, []).append(definition)
+
+    def get(self, card_id):
+        return self.cards[card_id]
+
+    def of_type(self, card_type):
+        return self.by_type.get(card_type, [])
+
+    def __iter__(self):
+        return iter(self.cards.values())
+
+    def __len__(self):
+        return len(self.cards)
+
+
+def load_cards(path=CARDS_PATH):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != CARDS_VERSION:
+        raise ValueError(f"不支持的卡牌数据版本: {data.get('version')}")
+    return CardRegistry(
+        CardDef(entry['id'], entry['name'], entry.get('attack', 0), entry.get('defense', 0),
+                entry.get('cost', 0), entry.get('type', "normal"), entry.get('effect', 'damage'),
+                entry.get('param'), entry.get('description'))
+        for entry in data['cards']
+    )
+
+
+_registry = None
+
+
+def default_registry():
+    # 默认卡牌数据只读取一次
+    global _registry
+    if _registry is None:
+        _registry = load_cards()
+    return _registry
@@ -0,0 +1,103 @@
+# 牌库：抽牌堆、手牌和弃牌堆保存从实例池取出的卡牌实例，抽牌和弃牌都是列表末尾的O(1)操作
+import random
+
+DEFAULT_POOL_SIZE = 32
+DEFAULT_HAND_LIMIT = 5
+
+
+class CardInstance:
+    # 卡牌实例只保存自身的状态，数值和效果来自共享的卡牌定义
+    __slots__ = ('definition', 'selected')
+
+    def __init__(self, definition=None):
+        self.definition = definition
+        self.selected = False
+
+
+class Deck:
+    def __init__(self, card_type=CardInstance, capacity=DEFAULT_POOL_SIZE, hand_limit=DEFAULT_HAND_LIMIT, rng=None):
+        # card_type(None) 创建一个空实例；界面使用可以绘制的卡牌类型
+        self.card_type = card_type
+        self.pool = []
+        self.free = []
+        self.reserve(capacity)
+        self.draw_pile = []  # 末尾为牌堆顶
+        self.hand = []
+        self.discard_pile = []
+        self.hand_limit = hand_limit
+        self.rng = rng if rng is not None else random
+        self.version = 0  # 手牌变化时加1，界面据此判断是否需要重绘
+
+    def reserve(self, capacity):
+        # 实例池一次性补足到 capacity，之后获得卡牌只是取出空闲实例
+        while len(self.pool) < capacity:
+            card = self.card_type(None)
+            self.pool.append(card)
+            self.free.append(card)
+
+    def _take(self, definition):
+        if not self.free:
+            self.reserve(2 * len(self.pool) or DEFAULT_POOL_SIZE)
+        card = self.free.pop()
+        card.definition = definition
+        card.selected = False
+        return card
+
+    def add(self, definition):
+        # 新获得的卡牌放入弃牌堆，抽牌堆抽空洗牌后才会抽到
+        card = self._take(definition)
+        self.discard_pile.append(card)
+        return card
+
+    def restore(self, draw_pile, hand, discard_pile):
+        # 按卡牌定义重建三个牌堆（恢复快照时使用），原有的卡牌实例放回池中
+        for pile in (self.draw_pile, self.hand, self.discard_pile):
+            self.free.extend(pile)
+            pile.clear()
+        for pile, definitions in ((self.draw_pile, draw_pile), (self.hand, hand), (self.discard_pile, discard_pile)):
+            pile.extend(self._take(definition) for definition in definitions)
+        self.version += 1
+
+    def shuffle(self):
+        self.rng.shuffle(self.draw_pile)
+
+    def draw(self, count=1):
+        # 手牌达到上限或牌库没有牌时停止，返回实际抽到的数量
+        drawn = 0
+        while drawn < count and len(self.hand) < self.hand_limit:
+            if not self.draw_pile:
+                if not self.discard_pile:
+                    break
+                # 弃牌堆整体成为新的抽牌堆：交换两个列表后原地洗牌，不复制卡牌
+                self.draw_pile, self.discard_pile = self.discard_pile, self.draw_pile
+                self.shuffle()
+            self.hand.append(self.draw_pile.pop())
+            drawn += 1
+        if drawn:
+            self.version += 1
+        return drawn
+
+    def fill_hand(self):
+        # 每个玩家回合开始时调用：手牌已满或牌库里没有可抽的牌时直接返回
+        missing = self.hand_limit - len(self.hand)
+        if missing <= 0 or not (self.draw_pile or self.discard_pile):
+            return 0
+        return self.draw(missing)
+
+    def discard(self, card):
+        # 手牌数量不超过上限，从手牌中移除的开销与牌库大小无关
+        self.hand.remove(card)
+        card.selected = False
+        self.discard_pile.append(card)
+        self.version += 1
+
+    def discard_hand(self):
+        for card in self.hand:
+            card.selected = False
+        self.discard_pile.extend(self.hand)
+        self.hand.clear()
+        self.version += 1
+
+    def __len__(self):
+        # 拥有的卡牌总数
+        return len(self.pool) - len(self.free)
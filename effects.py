@@ -0,0 +1,115 @@
+# 状态效果：按回合到期的效果放在以到期回合为键的小根堆中，每回合只处理到期的效果
+import heapq
+import itertools
+
+# 叠加规则：同一目标再次施加同一效果时如何处理
+REFRESH = 'refresh'  # 重置持续时间和次数
+EXTEND = 'extend'    # 持续时间和次数累加
+STACK = 'stack'      # 层数加一（不超过上限），持续时间和次数重置
+IGNORE = 'ignore'    # 已有该效果时不再施加
+STACKING_RULES = (REFRESH, EXTEND, STACK, IGNORE)
+
+
+class EffectType:
+    __slots__ = ('effect_id', 'stacking', 'max_stacks', 'on_apply', 'on_expire')
+
+    def __init__(self, effect_id, stacking=REFRESH, max_stacks=1, on_apply=None, on_expire=None):
+        if stacking not in STACKING_RULES:
+            raise ValueError(f"未知的叠加规则: {stacking}")
+        self.effect_id = effect_id
+        self.stacking = stacking
+        self.max_stacks = max_stacks
+        # 效果开始和结束时对目标的处理，例如设置/清除冰冻标记
+        self.on_apply = on_apply
+        self.on_expire = on_expire
+
+
+class StatusEffect:
+    # expires 为到期回合（None表示不按回合到期），charges 为剩余触发次数（None表示不限次数）
+    __slots__ = ('kind', 'target', 'expires', 'charges', 'stacks')
+
+    def __init__(self, kind, target, expires, charges):
+        self.kind = kind
+        self.target = target
+        self.expires = expires
+        self.charges = charges
+        self.stacks = 1
+
+
+class StatusEffects:
+    def __init__(self, types):
+        self.types = types  # 效果ID -> EffectType
+        self.turn = 0
+        self.active = {}  # (目标, 效果ID) -> StatusEffect
+        # (到期回合, 序号, 键, 效果)；重新施加后旧条目留在堆中，出堆时再丢弃
+        self.heap = []
+        self.sequence = itertools.count()
+
+    def apply(self, target, effect_id, duration=None, charges=None):
+        kind = self.types.get(effect_id)
+        if kind is None:
+            raise ValueError(f"未知的状态效果: {effect_id}")
+        key = (target, effect_id)
+        expires = self.turn + duration if duration is not None else None
+        effect = self.active.get(key)
+        if effect is None:
+            effect = StatusEffect(kind, target, expires, charges)
+            self.active[key] = effect
+            if kind.on_apply is not None:
+                kind.on_apply(target)
+        elif kind.stacking == IGNORE:
+            return effect
+        elif kind.stacking == EXTEND:
+            if duration is not None:
+                effect.expires = (effect.expires if effect.expires is not None else self.turn) + duration
+            if charges is not None:
+                effect.charges = (effect.charges or 0) + charges
+        else:
+            if kind.stacking == STACK:
+                effect.stacks = min(kind.max_stacks, effect.stacks + 1)
+            effect.expires = expires
+            effect.charges = charges
+        if effect.expires is not None:
+            heapq.heappush(self.heap, (effect.expires, next(self.sequence), key, effect))
+        return effect
+
+    def get(self, target, effect_id):
+        return self.active.get((target, effect_id))
+
+    def has(self, target, effect_id):
+        return (target, effect_id) in self.active
+
+    def remove(self, target, effect_id):
+        effect = self.active.pop((target, effect_id), None)
+        if effect is not None and effect.kind.on_expire is not None:
+            effect.kind.on_expire(target)
+        return effect
+
+    def consume(self, target, effect_id):
+        # 按次数计的效果触发一次，次数用完后移除；没有该效果时返回False
+        effect = self.active.get((target, effect_id))
+        if effect is None:
+            return False
+        if effect.charges is not None:
+            effect.charges -= 1
+            if effect.charges <= 0:
+                self.remove(target, effect_id)
+        return True
+
+    def advance(self):
+        # 进入下一回合，只弹出到期的效果
+        self.turn += 1
+        heap = self.heap
+        while heap and heap[0][0] <= self.turn:
+            expires, _, key, effect = heapq.heappop(heap)
+            if self.active.get(key) is effect and effect.expires == expires:
+                self.remove(*key)
+
+    def retain(self, targets):
+        # 只保留指定目标身上的效果，例如新战斗开始时清除上一场怪物的效果
+        for target, effect_id in [key for key in self.active if key[0] not in targets]:
+            self.remove(target, effect_id)
+
+    def clear(self):
+        self.active.clear()
+        self.heap.clear()
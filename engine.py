@@ -0,0 +1,382 @@
+# 战斗规则核心：不依赖pygame，游戏界面和无界面模拟器共用
+import random
+
+from deck import CardInstance, Deck
+from effects import REFRESH, EffectType, StatusEffects
+
+# 游戏状态
+GAME_STATE = {
+    'SELECT_CHARACTER': 0,
+    'BATTLE': 1,
+    'BUFF_SELECTION': 2,
+    'GAME_OVER': 3
+}
+
+# 可选角色：(名称, 生命, 攻击, 防御, 描述)
+CHARACTERS = [
+    ("战士", 2400, 15, 8, "高生命值，中等攻击"), # 120 * 20
+    ("法师", 1600, 20, 5, "高攻击，低防御"),   # 80 * 20
+    ("游侠", 2000, 12, 10, "平衡型角色")     # 100 * 20
+]
+
+# 概率事件：(自身受伤概率, 自身受到的伤害, 怪物受到的伤害)
+EVENT_TABLE = {
+    'risk': (0.75, 30, 50),     # 风险型：75%概率扣30血，25%概率怪物扣50血
+    'balance': (0.5, 20, 20),   # 均衡型：50%概率扣20血，50%概率怪物扣20血
+    'safe': (0.25, 10, 10),     # 稳健型：25%概率扣10血，75%概率怪物扣10血
+    'all_in': (0.9, 50, 100),   # 梭哈：90%概率扣50血，10%概率怪物扣100血
+    'scratch': (0.0, 0, 1)      # 刮痧：100%概率怪物扣1血
+}
+EVENT_TYPES = tuple(EVENT_TABLE)
+
+# 增益效果
+BUFF_TYPES = ('attack', 'defense', 'heal')
+BUFF_ATTACK = 2
+BUFF_DEFENSE = 2
+BUFF_HEAL = 20
+
+# 哥布林属性，血量随击杀数增加，基础50，每击杀一只+50
+GOBLIN_NAME = "哥布林"
+GOBLIN_BASE_HEALTH = 50
+GOBLIN_HEALTH_STEP = 50
+GOBLIN_ATTACK = 8
+GOBLIN_DEFENSE = 3
+
+# 雷击效果：后续若干次出牌额外伤害
+THUNDER_BONUS = 3
+THUNDER_DURATION = 2   # 触发次数
+FREEZE_DURATION = 1    # 跳过的怪物回合数
+
+# 刮刮卡：按幸运值缩放的随机数低于阈值时获得对应的卡牌，都不满足时获得普通攻击
+SCRATCH_SKILL_CHANCE = 0.1   # 技能卡，雷击和冰冻各一半
+SCRATCH_HEAVY_CHANCE = 0.3   # 重击
+
+# 怪物群模式：每场战斗同时出现的怪物数量，1为原来的单怪物战斗
+DEFAULT_WAVE_SIZE = 1
+
+
+def goblin_health(goblins_defeated):
+    return GOBLIN_BASE_HEALTH + goblins_defeated * GOBLIN_HEALTH_STEP
+
+
+class Combatant:
+    def __init__(self, name, health, attack, defense):
+        self.name = name
+        self.max_health = health
+        self.health = health
+        self.attack = attack
+        self.defense = defense
+        self.frozen = False  # 由冰冻状态效果设置和清除
+
+    def take_damage(self, damage):
+        actual_damage = max(1, damage - self.defense)
+        self.health = max(0, self.health - actual_damage)
+        return actual_damage
+
+    def attack_player(self, player):
+        damage = max(1, self.attack - player.defense)
+        player.health = max(0, player.health - damage)
+        return damage
+
+
+class PlayerState:
+    card_type = CardInstance  # 牌库中的卡牌实例类型，界面使用可以绘制的卡牌
+
+    def __init__(self, character=None, rng=None):
+        self.character = character
+        self.max_health = character.max_health if character else 2000 # 默认最大生命值提高20倍
+        self.health = character.health if character else 2000      # 默认当前生命值提高20倍
+        self.attack = character.attack if character else 10
+        self.defense = character.defense if character else 5
+        self.gold = 50
+        self.luck = 1
+        self.strength = 1
+        self.agility = 1
+        # 牌库：洗牌使用规则核心的随机数生成器，相同种子的对局抽到的手牌顺序一致
+        self.deck = Deck(self.card_type, rng=rng)
+
+
+def resolve_event(event_type, player, monster, rng):
+    self_chance, self_damage, monster_damage = EVENT_TABLE[event_type]
+    if self_chance and rng.random() < self_chance:
+        player.health = max(0, player.health - self_damage)
+        return False
+    monster.take_damage(monster_damage)
+    return True
+
+
+def scratch_reward(player, rng):
+    # 返回刮刮卡奖励的卡牌ID
+    rand = rng.random() * player.luck
+    if rand < SCRATCH_SKILL_CHANCE:
+        return 'thunder' if rng.random() < 0.5 else 'freeze'
+    if rand < SCRATCH_HEAVY_CHANCE:
+        return 'heavy_strike'
+    return 'strike'
+
+
+def apply_buff(player, buff):
+    if buff == 'attack':
+        player.attack += BUFF_ATTACK
+    elif buff == 'defense':
+        player.defense += BUFF_DEFENSE
+    elif buff == 'heal':
+        player.health = min(player.max_health, player.health + BUFF_HEAL)
+    else:
+        raise ValueError(f"未知的增益效果: {buff}")
+
+
+def set_frozen(value):
+    def handler(target):
+        target.frozen = value
+    return handler
+
+
+# 状态效果类型：冰冻按怪物回合到期，雷击按出牌次数消耗
+STATUS_TYPES = {
+    'freeze': EffectType('freeze', REFRESH, on_apply=set_frozen(True), on_expire=set_frozen(False)),
+    'thunder': EffectType('thunder', REFRESH)
+}
+
+
+# 卡牌效果处理函数：(卡牌定义, 玩家, 怪物, 状态效果) -> 对怪物造成的伤害
+def effect_damage(card, player, monster, effects):
+    return card.attack
+
+
+def effect_thunder(card, player, monster, effects):
+    effects.apply(player, 'thunder', charges=THUNDER_DURATION)
+    return card.attack
+
+
+def effect_freeze(card, player, monster, effects):
+    effects.apply(monster, 'freeze', duration=FREEZE_DURATION)
+    return card.attack
+
+
+def effect_buff(card, player, monster, effects):
+    apply_buff(player, card.param)
+    return 0
+
+
+# 效果ID -> 处理函数，卡牌定义加载时解析一次
+EFFECT_HANDLERS = {
+    'damage': effect_damage,
+    'thunder': effect_thunder,
+    'freeze': effect_freeze,
+    'buff': effect_buff
+}
+
+
+def apply_card_effect(card, player, monster, effects):
+    return card.handler(card, player, monster, effects)
+
+
+class GameRules:
+    def __init__(self, rng=None, characters=None, monster_factory=Combatant, player_factory=PlayerState,
+                 wave_size=DEFAULT_WAVE_SIZE):
+        self.rng = rng if rng is not None else random.Random()
+        self.characters = characters if characters is not None else [Combatant(*stats[:4]) for stats in CHARACTERS]
+        self.monster_factory = monster_factory
+        self.player_factory = player_factory
+        self.game_state = GAME_STATE['SELECT_CHARACTER']
+        self.current_character = None
+        self.player = None
+        self.monster = None
+        self.battle_round = 0
+        self.player_turn = True
+        self.goblins_defeated = 0  # 哥布林击杀计数器
+        # 每场战斗胜利后可以在增益选择界面刮开一张刮刮卡，reward 是刚刮出的卡牌定义
+        self.scratch_card_pending = False
+        self.scratch_card_reward = None
+        self.reset_stats()
+        self.effects = StatusEffects(STATUS_TYPES)
+        # 怪物群按列存储在 MonsterStore 中，self.monster 指向当前的攻击目标
+        if wave_size < 1:
+            raise ValueError(f"怪物数量必须大于0: {wave_size}")
+        self.wave_size = wave_size
+        self.monsters = None
+        self.wave_attackers = None  # 玩家回合开始时存活的怪物，本回合反击的就是这些怪物
+        if wave_size > 1:
+            from monsters import MonsterStore # 只有怪物群模式才需要NumPy
+            self.monsters = MonsterStore(wave_size)
+
+    def reset_stats(self):
+        # 本局统计，用于排行榜：玩家行动次数、打出的卡牌数和每种事件的选择次数
+        self.turns = 0
+        self.cards_played = 0
+        self.event_counts = dict.fromkeys(EVENT_TYPES, 0)
+
+    def create_monster(self):
+        return self.monster_factory(GOBLIN_NAME, goblin_health(self.goblins_defeated), GOBLIN_ATTACK, GOBLIN_DEFENSE)
+
+    def start_battle(self):
+        # 上一场怪物身上的效果不带入新战斗，玩家的效果保留
+        self.effects.retain((self.player,))
+        if self.monsters is not None:
+            self.monsters.clear()
+            self.monsters.spawn(GOBLIN_NAME, goblin_health(self.goblins_defeated), GOBLIN_ATTACK, GOBLIN_DEFENSE,
+                                self.wave_size)
+            self.wave_attackers = self.monsters.alive()
+            self.monster = self.monsters.front()
+        else:
+            self.monster = self.create_monster()
+        self.battle_round = 1
+        self.player_turn = True
+        self.scratch_card_pending = False # 没有刮开的刮刮卡在下一场战斗开始时作废
+        self.scratch_card_reward = None
+        self.player.deck.fill_hand()
+
+    def select_character(self, index):
+        character = self.characters[index]
+        self.current_character = character
+        self.player = self.player_factory(character, self.rng)
+        self.goblins_defeated = 0 # 新游戏开始，重置击杀计数
+        self.reset_stats()
+        self.game_state = GAME_STATE['BATTLE']
+        self.start_battle()
+
+    def trigger_event(self, event_type):
+        # 玩家回合：结算概率事件后轮到怪物
+        resolve_event(event_type, self.player, self.monster, self.rng)
+        self.turns += 1
+        self.event_counts[event_type] += 1
+        self.player_turn = False
+
+    def play_card(self, card):
+        damage = apply_card_effect(card, self.player, self.monster, self.effects)
+        if damage > 0:
+            self.monster.take_damage(damage)
+        # 如果玩家有雷属性效果，增加额外伤害（怪物群模式下波及所有怪物）
+        if self.effects.consume(self.player, 'thunder'):
+            self.damage_all(THUNDER_BONUS)
+        self.turns += 1
+        self.cards_played += 1
+        self.player_turn = False
+
+    def play_hand_card(self, index):
+        # 打出第 index 张手牌，打出的卡牌进入弃牌堆
+        deck = self.player.deck
+        card = deck.hand[index]
+        self.play_card(card.definition)
+        deck.discard(card)
+
+    def damage_all(self, damage):
+        # 范围伤害：怪物群模式下对所有存活怪物批量结算
+        if self.monsters is not None:
+            return self.monsters.take_damage_all(damage)
+        return self.monster.take_damage(damage)
+
+    def update(self):
+        if self.game_state != GAME_STATE['BATTLE'] or self.player_turn or not self.monster:
+            return
+        if self.monsters is not None:
+            self.update_wave()
+            return
+        # 怪物回合：被冰冻的怪物跳过攻击，冰冻在回合推进时按到期时间解除
+        monster = self.monster
+        if not monster.frozen:
+            monster.attack_player(self.player)
+        self.end_turn()
+
+        # 检查战斗是否结束
+        if self.player.health <= 0:
+            self.game_state = GAME_STATE['GAME_OVER']
+        elif monster.health <= 0:
+            self.goblins_defeated += 1 # 击杀数增加
+            self.game_state = GAME_STATE['BUFF_SELECTION']
+            self.scratch_card_pending = True
+
+    def update_wave(self):
+        # 怪物群回合：玩家回合开始时存活且未被冰冻的怪物一起反击，目标换成最前面的存活怪物
+        # 与单怪物战斗一致：本回合刚被击败的怪物仍会反击一次，之前回合已被击败的不再反击
+        self.monsters.counter_attack(self.player, self.wave_attackers)
+        self.end_turn()
+        self.wave_attackers = self.monsters.alive()
+        front = self.monsters.front()
+        if front is not None:
+            self.monster = front
+
+        if self.player.health <= 0:
+            self.game_state = GAME_STATE['GAME_OVER']
+        elif front is None:
+            self.goblins_defeated += self.monsters.count # 整群怪物都被击败
+            self.game_state = GAME_STATE['BUFF_SELECTION']
+            self.scratch_card_pending = True
+
+    def end_turn(self):
+        self.player_turn = True
+        self.battle_round += 1
+        self.effects.advance()
+        # 玩家回合开始时补满手牌；牌库为空时不抽牌
+        self.player.deck.fill_hand()
+
+    def scratch_card(self):
+        # 刮开本场战斗的刮刮卡，奖励卡牌进入弃牌堆
+        from cards import default_registry # cards 依赖本模块，在这里导入避免循环引用
+        reward = default_registry().get(scratch_reward(self.player, self.rng))
+        self.player.deck.add(reward)
+        self.scratch_card_pending = False
+        self.scratch_card_reward = reward
+        return reward
+
+    def choose_buff(self, buff):
+        apply_buff(self.player, buff)
+        # 返回战斗状态
+        self.game_state = GAME_STATE['BATTLE']
+        self.start_battle()
+
+    def apply_action(self, action):
+        # 玩家操作：('select', 角色序号) / ('event', 事件类型) / ('card', 手牌序号) / ('scratch_card',) / ('buff', 增益)
+        # 以及 ('restart',)
+        kind = action[0]
+        if kind == 'select':
+            self.select_character(action[1])
+        elif kind == 'event':
+            self.trigger_event(action[1])
+        elif kind == 'card':
+            self.play_hand_card(action[1])
+        elif kind == 'scratch_card':
+            self.scratch_card()
+        elif kind == 'buff':
+            self.choose_buff(action[1])
+        elif kind == 'restart':
+            self.restart()
+        else:
+            raise ValueError(f"未知的操作: {action}")
+
+    def validate_action(self, action):
+        # 界面只在对应界面分发点击，外部调用方（如服务器）执行操作前需要检查是否符合当前状态
+        kind = action[0] if action else None
+        state = self.game_state
+        if kind == 'select':
+            valid = (state == GAME_STATE['SELECT_CHARACTER'] and len(action) == 2 and type(action[1]) is int
+                     and 0 <= action[1] < len(self.characters))
+        elif kind == 'event':
+            valid = (state == GAME_STATE['BATTLE'] and self.player_turn and len(action) == 2
+                     and action[1] in EVENT_TYPES)
+        elif kind == 'card':
+            valid = (state == GAME_STATE['BATTLE'] and self.player_turn and len(action) == 2 and type(action[1]) is int
+                     and 0 <= action[1] < len(self.player.deck.hand))
+        elif kind == 'scratch_card':
+            valid = state == GAME_STATE['BUFF_SELECTION'] and self.scratch_card_pending and len(action) == 1
+        elif kind == 'buff':
+            valid = state == GAME_STATE['BUFF_SELECTION'] and len(action) == 2 and action[1] in BUFF_TYPES
+        elif kind == 'restart':
+            valid = state == GAME_STATE['GAME_OVER'] and len(action) == 1
+        else:
+            raise ValueError(f"未知的操作: {action}")
+        if not valid:
+            raise ValueError(f"当前状态不能执行该操作: {action}")
+
+    def restart(self):
+        self.game_state = GAME_STATE['SELECT_CHARACTER']
+        self.player = None
+        self.monster = None
+        self.current_character = None
+        self.battle_round = 0
+        self.player_turn = True
+        self.scratch_card_pending = False
+        self.scratch_card_reward = None
+        self.effects.clear()
+        # goblins_defeated 会在选择角色时重置
@@ -0,0 +1,88 @@
+import pygame
+
+# 字体回退链：依次尝试能显示中文的系统字体，都找不到时使用pygame默认字体
+FONT_FALLBACK_CHAIN = [
+    'microsoftyahei', 'msyh', 'simhei', 'simsun',
+    'notosanscjksc', 'notosanscjk', 'notosanssc', 'sourcehansanssc',
+    'wenquanyimicrohei', 'wenquanyizenhei', 'pingfangsc', 'heitisc',
+    'arialunicodems',
+]
+
+# 游戏中用到的字号，启动时一次性创建
+PRELOAD_SIZES = (14, 20, 24, 30, 36, 48)
+
+
+class FontRegistry:
+    def __init__(self, names=FONT_FALLBACK_CHAIN, sizes=PRELOAD_SIZES):
+        self.names = list(names)
+        self.sizes = tuple(sizes)
+        self.path = None
+        self.resolved = False
+        self.raw_fonts = {}
+        # get 返回的字体；开启性能分析时为包装后的字体
+        self.fonts = {}
+        self.wrap = None
+        # 命中/未命中计数，用于确认帧循环里没有再创建字体
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self):
+        # 系统字体列表只扫描一次
+        if not self.resolved:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            for name in self.names:
+                path = pygame.font.match_font(name)
+                if path:
+                    self.path = path
+                    break
+            self.resolved = True
+        return self.path
+
+    def preload(self):
+        self.resolve()
+        for size in self.sizes:
+            if size not in self.fonts:
+                self._add(size, self._build(size))
+        return self
+
+    def _add(self, size, font):
+        self.raw_fonts[size] = font
+        self.fonts[size] = self.wrap(font) if self.wrap else font
+        return self.fonts[size]
+
+    def instrument(self, wrap):
+        # 用 wrap(字体) 的结果替换所有字体（例如统计 render 次数），传入None恢复原字体
+        self.wrap = wrap
+        self.fonts = {size: wrap(font) if wrap else font for size, font in self.raw_fonts.items()}
+
+    def _build(self, size):
+        try:
+            return pygame.font.Font(self.path, size)
+        except (OSError, pygame.error):
+            # 字体文件无法读取时退回默认字体
+            print(f"无法加载字体: {self.path}")
+            self.path = None
+            return pygame.font.Font(None, size)
+
+    def get(self, size):
+        font = self.fonts.get(size)
+        if font is not None:
+            self.hits += 1
+            return font
+        # 未预加载的字号：创建一次后缓存
+        self.misses += 1
+        self.resolve()
+        return self._add(size, self._build(size))
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'sizes': sorted(self.fonts),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
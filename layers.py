@@ -0,0 +1,55 @@
+import pygame
+
+
+class StaticLayerCache:
+    def __init__(self, size):
+        self.size = tuple(size)
+        # 游戏状态 -> 烘焙函数 / 烘焙好的静态层
+        self.builders = {}
+        self.layers = {}
+        # (宽, 高, 颜色, 透明度) -> 半透明底板
+        self.panels = {}
+        self.bakes = 0
+
+    def register(self, key, builder):
+        self.builders[key] = builder
+        self.layers.pop(key, None)
+
+    def get(self, key):
+        layer = self.layers.get(key)
+        if layer is None:
+            layer = self.bake(key)
+        return layer
+
+    def bake(self, key):
+        # 把该状态下不会变化的内容画到一张表面上，之后每帧只需一次blit
+        surface = pygame.Surface(self.size)
+        self.builders[key](surface)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        self.layers[key] = surface
+        self.bakes += 1
+        return surface
+
+    def invalidate(self, key=None):
+        if key is None:
+            self.layers.clear()
+        else:
+            self.layers.pop(key, None)
+
+    def resize(self, size):
+        self.size = tuple(size)
+        self.invalidate()
+
+    def panel(self, size, color, alpha):
+        # 尺寸固定的半透明底板只创建一次
+        key = (size[0], size[1], color, alpha)
+        surface = self.panels.get(key)
+        if surface is None:
+            surface = pygame.Surface(size)
+            surface.fill(color)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            surface.set_alpha(alpha)
+            self.panels[key] = surface
+        return surface
@@ -0,0 +1,133 @@
+# 界面布局表：每个状态的矩形只计算一次，绘制和点击判定共用
+import pygame
+
+from engine import EVENT_TYPES, GAME_STATE
+
+# 卡面尺寸
+CHARACTER_SIZE = (200, 300)
+MONSTER_SIZE = (150, 200)
+CARD_SIZE = (100, 150)
+# 手牌比增益卡牌矮，放在事件按钮说明文字下方的底部条带中，不遮挡说明文字
+HAND_CARD_SIZE = (100, 95)
+HAND_AREA_WIDTH = 700
+SCRATCH_CARD_SIZE = (150, 100)
+
+# 战斗界面最多同时显示的怪物数量，再多会与玩家属性面板重叠
+MAX_MONSTER_SLOTS = 2
+
+# 网格索引的格子边长（像素）
+CELL_SIZE = 64
+
+
+class HitGrid:
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        # (格子x, 格子y) -> [(矩形, 目标), ...]，后加入的在上层
+        self.cells = {}
+
+    def insert(self, target, rect):
+        rect = pygame.Rect(rect)
+        size = self.cell_size
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                self.cells.setdefault((cx, cy), []).append((rect, target))
+
+    def query(self, pos):
+        # 只检查鼠标所在格子里的候选，与屏幕上的目标总数无关
+        entries = self.cells.get((pos[0] // self.cell_size, pos[1] // self.cell_size))
+        if entries:
+            for rect, target in reversed(entries):
+                if rect.collidepoint(pos):
+                    return target
+        return None
+
+    def clear(self):
+        self.cells.clear()
+
+
+class Layout:
+    def __init__(self, screen_size, character_count, buff_count):
+        width, height = screen_size
+        # 角色选择界面
+        self.character_rects = [pygame.Rect(50 + i * 250, 150, *CHARACTER_SIZE) for i in range(character_count)]
+        self.title_y = 50
+
+        # 战斗界面
+        self.player_panel = pygame.Rect(10, 10, 200, 150)
+        self.player_health_bar = pygame.Rect(10, 150, 200, 20)
+        self.event_buttons = {
+            event_type: pygame.Rect(50 + i * 140, 400, 120, 40) # 风险型/均衡型/稳健型/梭哈/刮痧
+            for i, event_type in enumerate(EVENT_TYPES)
+        }
+        # 按钮上方显示一直选择该事件的胜率
+        self.win_chance_rects = {
+            event_type: pygame.Rect(button.x, button.y - 26, button.width, 22)
+            for event_type, button in self.event_buttons.items()
+        }
+        self.monster_rects = []
+        self.hand_top = height - HAND_CARD_SIZE[1] - 5
+        self.hand_rects = []
+
+        # 增益选择界面
+        self.buff_rects = [pygame.Rect(50 + i * 250, 200, *CARD_SIZE) for i in range(buff_count)]
+        # 增益卡牌下方居中的刮刮卡
+        self.scratch_card_rect = pygame.Rect(width // 2 - SCRATCH_CARD_SIZE[0] // 2, 400, *SCRATCH_CARD_SIZE)
+
+        # 游戏结束界面的重新开始按钮
+        self.restart_button = pygame.Rect(width // 2 - 75, height // 2 + 50, 150, 50)
+
+        self.grids = {state: HitGrid() for state in GAME_STATE.values()}
+        for i, rect in enumerate(self.character_rects):
+            self.grids[GAME_STATE['SELECT_CHARACTER']].insert(('character', i), rect)
+        for i, rect in enumerate(self.buff_rects):
+            self.grids[GAME_STATE['BUFF_SELECTION']].insert(('buff', i), rect)
+        self.grids[GAME_STATE['BUFF_SELECTION']].insert(('scratch_card', 0), self.scratch_card_rect)
+        self.grids[GAME_STATE['GAME_OVER']].insert(('restart', 0), self.restart_button)
+        self.set_battle(1, 0)
+
+    @property
+    def monster_rect(self):
+        return self.monster_rects[0]
+
+    def monster_health_bar(self, index=0):
+        rect = self.monster_rects[index]
+        return pygame.Rect(rect.x, rect.y - 20, rect.width, 10)
+
+    def hand_area(self):
+        # 手牌展开的最大范围，与手牌数量无关
+        return pygame.Rect(50, self.hand_top, HAND_AREA_WIDTH, HAND_CARD_SIZE[1])
+
+    def event_buttons_area(self):
+        buttons = list(self.event_buttons.values())
+        return buttons[0].unionall(buttons[1:])
+
+    def win_chance_area(self):
+        rects = list(self.win_chance_rects.values())
+        return rects[0].unionall(rects[1:])
+
+    def monster_area(self):
+        # 所有怪物位置、血条以及下方剩余数量提示的外框
+        area = self.monster_rects[0].union(self.monster_health_bar(0))
+        for i, rect in enumerate(self.monster_rects):
+            area.union_ip(rect.union(self.monster_health_bar(i)))
+        return area.union((area.x, area.bottom, area.width, 30))
+
+    def set_battle(self, monster_count, hand_size):
+        # 怪物从右向左排开，手牌沿底部展开；数量变化时重建战斗界面的索引
+        self.monster_rects = [pygame.Rect(500 - i * 170, 100, *MONSTER_SIZE) for i in range(monster_count)]
+        self.hand_rects = []
+        if hand_size:
+            step = min(HAND_CARD_SIZE[0] + 10, (HAND_AREA_WIDTH - HAND_CARD_SIZE[0]) // max(1, hand_size - 1))
+            self.hand_rects = [pygame.Rect(50 + i * step, self.hand_top, *HAND_CARD_SIZE) for i in range(hand_size)]
+
+        grid = self.grids[GAME_STATE['BATTLE']]
+        grid.clear()
+        for event_type, rect in self.event_buttons.items():
+            grid.insert(('event', event_type), rect)
+        for i, rect in enumerate(self.monster_rects):
+            grid.insert(('monster', i), rect)
+        for i, rect in enumerate(self.hand_rects):
+            grid.insert(('card', i), rect)
+
+    def hit_test(self, state, pos):
+        return self.grids[state].query(pos)
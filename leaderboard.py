@@ -0,0 +1,234 @@
+# 排行榜：每局成绩写入 SQLite（WAL 模式），后台线程批量提交；游戏结束界面从内存缓存读取排名，不在帧循环里查询数据库
+import argparse
+import bisect
+import getpass
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from engine import CHARACTERS, EVENT_TYPES
+
+LEADERBOARD_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'leaderboard.db')
+TOP_N = 5
+BATCH_SIZE = 256        # 攒够这么多局立即写入
+FLUSH_INTERVAL = 1.0    # 第一局成绩提交后最多等待的秒数
+
+EVENT_COLUMNS = tuple(f'event_{event_type}' for event_type in EVENT_TYPES)
+RUN_FIELDS = ('player', 'character', 'wave', 'kills', 'turns', 'cards') + EVENT_COLUMNS + ('created',)
+
+SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    character TEXT NOT NULL,
+    wave INTEGER NOT NULL,
+    kills INTEGER NOT NULL,
+    turns INTEGER NOT NULL,
+    cards INTEGER NOT NULL,
+    {', '.join(f'{column} INTEGER NOT NULL' for column in EVENT_COLUMNS)},
+    created REAL NOT NULL
+);
+-- 每个角色的前N名：按索引顺序读取前N行，不需要排序整张表
+CREATE INDEX IF NOT EXISTS runs_rank ON runs (wave, character, kills DESC, turns);
+-- 个人最佳：同样只读取索引中的第一行
+CREATE INDEX IF NOT EXISTS runs_personal_best ON runs (player, wave, character, kills DESC);
+'''
+INSERT_RUN = f"INSERT INTO runs ({', '.join(RUN_FIELDS)}) VALUES ({', '.join('?' * len(RUN_FIELDS))})"
+
+
+def default_player():
+    try:
+        return getpass.getuser()
+    except (KeyError, OSError):
+        return "玩家"
+
+
+def connect(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(path)
+    # WAL 模式下读写互不阻塞；NORMAL 同步级别只在检查点时 fsync，断电最多丢失最近提交的几批
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def run_record(rules, player, created=None):
+    # 一局的成绩：按 RUN_FIELDS 顺序的元组
+    return ((player, rules.current_character.name, rules.wave_size, rules.goblins_defeated, rules.turns,
+             rules.cards_played) + tuple(rules.event_counts[event_type] for event_type in EVENT_TYPES)
+            + (time.time() if created is None else created,))
+
+
+def top_runs(connection, character, limit=TOP_N, wave=1):
+    return connection.execute(
+        'SELECT player, kills, turns FROM runs WHERE wave = ? AND character = ? ORDER BY kills DESC, turns LIMIT ?',
+        (wave, character, limit)).fetchall()
+
+
+def personal_best(connection, player, character, wave=1):
+    row = connection.execute(
+        'SELECT kills FROM runs WHERE player = ? AND wave = ? AND character = ? ORDER BY kills DESC LIMIT 1',
+        (player, wave, character)).fetchone()
+    return row[0] if row else None
+
+
+class LeaderboardWriter:
+    # 后台写入线程：主线程提交后立即返回，攒够一批或等待超过刷新间隔后在一个事务中写入
+    def __init__(self, path, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.closed = False
+        self.writes = 0
+        self.batches = 0
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name='leaderboard-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, record):
+        with self.condition:
+            self.pending.append(record)
+            # 只在开始计时和凑够一批时唤醒写入线程
+            if len(self.pending) == 1 or len(self.pending) == self.batch_size:
+                self.condition.notify()
+
+    def _run(self):
+        # SQLite 连接只能在创建它的线程中使用
+        try:
+            connection = connect(self.path)
+        except sqlite3.Error as e:
+            print(f"无法打开排行榜: {self.path}: {e}")
+            connection = None
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                deadline = time.monotonic() + self.flush_interval
+                while not self.closed and len(self.pending) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                batch, self.pending = self.pending, []
+                closed = self.closed
+            if batch and connection is not None:
+                try:
+                    with connection:
+                        connection.executemany(INSERT_RUN, batch)
+                    self.writes += len(batch)
+                    self.batches += 1
+                except sqlite3.Error as e:
+                    print(f"无法写入排行榜: {self.path}: {e}")
+            if closed:
+                if connection is not None:
+                    connection.close()
+                return
+
+    def close(self):
+        # 写完所有待写的成绩后结束线程
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+
+
+class RankingCache:
+    # 每个 (怪物群数量, 角色) 的前N名和个人最佳：启动时查询一次，之后每局结束时增量更新
+    def __init__(self, limit=TOP_N):
+        self.limit = limit
+        self.rankings = {}  # (wave, 角色) -> 按 (-击杀数, 回合数) 排序的 (-击杀数, 回合数, 玩家)
+        self.best = {}      # (玩家, wave, 角色) -> 最多击杀数
+        self.version = 0    # 每次变化加1，界面据此判断是否需要重绘
+
+    def load(self, connection, player, characters, wave=1):
+        for character in characters:
+            self.rankings[(wave, character)] = [(-kills, turns, name)
+                                                for name, kills, turns in top_runs(connection, character,
+                                                                                   self.limit, wave)]
+            best = personal_best(connection, player, character, wave)
+            if best is not None:
+                self.best[(player, wave, character)] = best
+        self.version += 1
+
+    def record(self, player, character, kills, turns, wave=1):
+        ranking = self.rankings.setdefault((wave, character), [])
+        bisect.insort(ranking, (-kills, turns, player))
+        del ranking[self.limit:]
+        key = (player, wave, character)
+        if kills > self.best.get(key, -1):
+            self.best[key] = kills
+        self.version += 1
+
+    def ranking(self, character, wave=1):
+        # [(玩家, 击杀数, 回合数)]，按名次排列
+        return [(name, -kills, turns) for kills, turns, name in self.rankings.get((wave, character), ())]
+
+    def personal_best(self, player, character, wave=1):
+        return self.best.get((player, wave, character))
+
+
+class Leaderboard:
+    def __init__(self, path=LEADERBOARD_PATH, player=None, wave=1):
+        self.path = path
+        self.player = player or default_player()
+        self.wave = wave
+        self.cache = RankingCache()
+        self.writer = LeaderboardWriter(path)
+
+    def load(self):
+        # 读取已有的排名，只在启动时调用一次
+        try:
+            connection = connect(self.path)
+            try:
+                self.cache.load(connection, self.player, [stats[0] for stats in CHARACTERS], self.wave)
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"无法读取排行榜: {self.path}: {e}")
+
+    def record(self, rules):
+        record = run_record(rules, self.player)
+        self.writer.submit(record)
+        self.cache.record(self.player, rules.current_character.name, rules.goblins_defeated, rules.turns, self.wave)
+
+    def close(self):
+        self.writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="查看排行榜")
+    parser.add_argument('--path', default=LEADERBOARD_PATH)
+    parser.add_argument('--character', default=None, choices=[stats[0] for stats in CHARACTERS],
+                        help="只显示一个角色，默认全部")
+    parser.add_argument('--player', default=None, help="查询该玩家的个人最佳，默认为当前用户")
+    parser.add_argument('--wave', type=int, default=1)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        print(f"排行榜不存在: {args.path}")
+        return 1
+    player = args.player or default_player()
+    connection = connect(args.path)
+    (total,) = connection.execute('SELECT COUNT(*) FROM runs').fetchone()
+    print(f"共 {total} 局")
+    for character in [args.character] if args.character else [stats[0] for stats in CHARACTERS]:
+        start = time.perf_counter()
+        runs = top_runs(connection, character, args.top, args.wave)
+        best = personal_best(connection, player, character, args.wave)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{character}  ({player} 的最佳: {best if best is not None else '-'}，查询 {elapsed:.2f}ms)")
+        for rank, (name, kills, turns) in enumerate(runs, 1):
+            print(f"  {rank:>2}. {name:<16} 击杀 {kills:>3}  回合 {turns}")
+    connection.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# 游戏服务器压测客户端：多个并发连接各自不断开新局、按固定策略打到游戏结束，统计每秒完成的对局数和回合延迟
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from engine import BUFF_TYPES, EVENT_TYPES
+from server import DEFAULT_HOST, DEFAULT_PORT, GameServer
+
+DEFAULT_CONCURRENCY = 32
+DEFAULT_SESSIONS = 200
+DEFAULT_MAX_TURNS = 5000  # 每局最多的回合数，超过后主动结束该局
+
+
+class Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+
+    async def request(self, request):
+        self.next_id += 1
+        request['id'] = self.next_id
+        self.writer.write((json.dumps(request, separators=(',', ':')) + '\n').encode('utf-8'))
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("服务器关闭了连接")
+        response = json.loads(line)
+        if response.get('id') != self.next_id:
+            raise ValueError(f"响应顺序错误: {response}")
+        if not response.get('ok'):
+            raise ValueError(response.get('error'))
+        return response
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def connect(host, port, path):
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    return Connection(reader, writer)
+
+
+def choose_action(state, policy, rng):
+    # 按服务器返回的状态选择下一个操作
+    if state['state'] == 'BATTLE':
+        return ['event', policy if policy != 'random' else rng.choice(EVENT_TYPES)]
+    if state['state'] == 'BUFF_SELECTION':
+        return ['buff', 'heal' if policy != 'random' else rng.choice(BUFF_TYPES)]
+    return None
+
+
+async def worker(connection, queue, latencies, args, rng):
+    # 从队列领取对局序号直到领完；每个操作的往返时间计入回合延迟
+    completed = 0
+    while True:
+        try:
+            index = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return completed
+        response = await connection.request({'op': 'new', 'seed': args.seed + index, 'wave': args.wave})
+        session = response['session']
+        action = ['select', index % 3]
+        for _ in range(args.max_turns):
+            start = time.perf_counter()
+            state = (await connection.request({'op': 'act', 'session': session, 'action': action}))['state']
+            latencies.append(time.perf_counter() - start)
+            action = choose_action(state, args.policy, rng)
+            if action is None:
+                break
+        await connection.request({'op': 'close', 'session': session})
+        completed += 1
+
+
+async def run_load(args):
+    local = None
+    host, port, path = args.host, args.port, args.unix
+    if args.local:
+        # 在同一进程内启动服务器，便于没有单独启动服务器时直接压测
+        local = GameServer()
+        await local.start(host, 0, path)
+        if path is None:
+            host, port = local.address()[:2]
+
+    queue = asyncio.Queue()
+    for index in range(args.sessions):
+        queue.put_nowait(index)
+    latencies = []
+    connections = [await connect(host, port, path) for _ in range(args.concurrency)]
+    start = time.perf_counter()
+    try:
+        completed = await asyncio.gather(*(worker(connection, queue, latencies, args, random.Random(args.seed + i))
+                                           for i, connection in enumerate(connections)))
+    finally:
+        elapsed = time.perf_counter() - start
+        for connection in connections:
+            await connection.close()
+        if local is not None:
+            await local.close()
+
+    latencies.sort()
+    sessions = sum(completed)
+    print(f"并发连接: {args.concurrency}  对局: {sessions}  回合: {len(latencies)}  耗时: {elapsed:.2f}s")
+    print(f"对局/秒: {sessions / elapsed:.1f}  回合/秒: {len(latencies) / elapsed:.0f}")
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+        print(f"回合延迟 p50: {p50 * 1000:.3f}ms  p99: {p99 * 1000:.3f}ms  最大: {latencies[-1] * 1000:.3f}ms")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="游戏服务器压测客户端")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', metavar='PATH', default=None, help="连接 Unix 套接字")
+    parser.add_argument('--local', action='store_true', help="在本进程内启动服务器")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="并发连接数")
+    parser.add_argument('--sessions', type=int, default=DEFAULT_SESSIONS, help="总对局数")
+    parser.add_argument('--max-turns', type=int, default=DEFAULT_MAX_TURNS)
+    parser.add_argument('--policy', default='safe', choices=EVENT_TYPES + ('random',))
+    parser.add_argument('--wave', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    return asyncio.run(run_load(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,50 @@
+import time
+IMPORT_START = time.perf_counter() # 启动计时起点
+
 import pygame
 import random
 import sys
 import os
 
-# 初始化Pygame
-pygame.init()
+from assets import AssetLoader, AssetManager, LazyImages
+from atlas import ATLAS_INDEX, TextureAtlas
+from cards import default_registry
+from deck import CardInstance
+from engine import (CHARACTERS, DEFAULT_WAVE_SIZE, EVENT_TYPES, GAME_STATE, GOBLIN_NAME, Combatant, GameRules,
+                    PlayerState, apply_card_effect)
+from fonts import FontRegistry
+from layers import StaticLayerCache
+from layout import CHARACTER_SIZE, HAND_CARD_SIZE, MAX_MONSTER_SLOTS, MONSTER_SIZE, Layout
+from profiler import FrameProfiler
+from render import DirtyRegionTracker, RENDER_MODES
+from snapshot import SnapshotWriter, dump_rules, load_rules, read_snapshot
+from text_render import OutlinedTextCache
+from timing import StartupTimer
 
 # 游戏常量
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 FPS = 60
 
+# 空闲时阻塞等待输入的最长时间，以及收到输入后保持满帧率的时间（毫秒）
+IDLE_TIMEOUT_MS = 1000
+ACTIVE_WINDOW_MS = 250
+
+# 游戏用到的事件类型，其余事件不进入事件队列
+ALLOWED_EVENTS = [
+    pygame.QUIT,
+    pygame.MOUSEBUTTONDOWN,
+    pygame.MOUSEBUTTONUP,
+    pygame.MOUSEMOTION,
+    pygame.VIDEORESIZE,
+    pygame.VIDEOEXPOSE,
+    pygame.WINDOWEXPOSED,
+    pygame.KEYDOWN
+]
+
+# 进度界面期间忽略的输入
+MOUSE_EVENTS = (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION)
+
 # 颜色定义
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -19,12 +53,51 @@ GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
 YELLOW = (255, 255, 0)
 
-# 游戏状态
-GAME_STATE = {
-    'SELECT_CHARACTER': 0,
-    'BATTLE': 1,
-    'BUFF_SELECTION': 2,
-    'GAME_OVER': 3
+# 推荐事件提示：在最优策略表推荐的事件按钮外画边框
+HINT_COLOR = YELLOW
+HINT_BORDER = 4
+
+# 性能分析浮层的开关按键和位置
+PROFILER_KEY = pygame.K_F3
+PROFILER_RECT = pygame.Rect(SCREEN_WIDTH - 270, SCREEN_HEIGHT - 75, 260, 65)
+
+# 游戏结束界面的排行榜，位于重新开始按钮下方
+RANKINGS_RECT = pygame.Rect(SCREEN_WIDTH//2 - 200, SCREEN_HEIGHT//2 + 110, 400, 150)
+
+# 图片加载期间的进度条
+LOADING_BAR_RECT = pygame.Rect(SCREEN_WIDTH//2 - 200, SCREEN_HEIGHT//2 - 10, 400, 20)
+
+# 各状态使用的背景图片
+BACKGROUND_KEYS = {
+    GAME_STATE['SELECT_CHARACTER']: 'menu',
+    GAME_STATE['BATTLE']: 'battle',
+    GAME_STATE['BUFF_SELECTION']: 'buff',
+    GAME_STATE['GAME_OVER']: 'game_over'
+}
+
+# 事件按钮外观
+BUTTON_COLORS = {
+    'risk': (255, 0, 0),      # 红色
+    'balance': (255, 165, 0),  # 橙色
+    'safe': (0, 255, 0),      # 绿色
+    'all_in': (128, 0, 128),  # 紫色
+    'scratch': (0, 0, 255)    # 蓝色
+}
+
+BUTTON_TEXTS = {
+    'risk': "风险型",
+    'balance': "均衡型",
+    'safe': "稳健型",
+    'all_in': "梭哈",
+    'scratch': "刮痧"
+}
+
+BUTTON_DESCRIPTIONS = {
+    'risk': ["75%几率自身-30HP", "25%几率怪物-50HP"],
+    'balance': ["50%几率自身-20HP", "50%几率怪物-20HP"],
+    'safe': ["25%几率自身-10HP", "75%几率怪物-10HP"],
+    'all_in': ["90%几率自身-50HP", "10%几率怪物-100HP"],
+    'scratch': ["100%几率怪物-1HP"]
 }
 
 # 资源路径
@@ -33,25 +106,31 @@ CHARACTERS_DIR = os.path.join(ASSETS_DIR, 'characters')
 MONSTERS_DIR = os.path.join(ASSETS_DIR, 'monsters')
 BACKGROUNDS_DIR = os.path.join(ASSETS_DIR, 'backgrounds')
 
+# 图片只从磁盘读取一次，缩放结果按尺寸缓存，所有角色和怪物共享同一张图片
+# 构建了纹理图集（python atlas.py build）时优先从图集中取预缩放的图片
+ASSETS = AssetManager(atlas=TextureAtlas(os.path.join(ASSETS_DIR, ATLAS_INDEX), ASSETS_DIR))
+
 # 加载图片函数
 def load_image(path, size=None):
-    try:
-        image = pygame.image.load(path)
-        if size:
-            image = pygame.transform.scale(image, size)
-        return image
-    except:
-        print(f"无法加载图片: {path}")
-        return None
-
-# 字体设置
+    return ASSETS.get(path, size)
+
+def character_image_path(name):
+    return os.path.join(CHARACTERS_DIR, f"{name.lower()}.png")
+
+def monster_image_path(name):
+    return os.path.join(MONSTERS_DIR, f"{name.lower()}.png")
+
+# 字体设置：所有字号共享同一个字体注册表，避免每帧重复创建字体
+FONTS = FontRegistry()
+
 def get_font(size):
-    try:
-        # 尝试使用微软雅黑
-        return pygame.font.SysFont('microsoftyahei', size)
-    except:
-        # 如果找不到微软雅黑，使用系统默认字体
-        return pygame.font.Font(None, size)
+    return FONTS.get(size)
+
+# 带描边文字：合成一次后缓存，每帧只需一次blit
+TEXT_CACHE = OutlinedTextCache(get_font)
+
+def draw_text_with_outline(screen, text, pos, size=24, color=BLACK, outline_color=WHITE):
+    return TEXT_CACHE.draw(screen, text, pos, size, color, outline_color)
 
 class Character:
     def __init__(self, name, health, attack, defense, description):
@@ -61,11 +140,14 @@ class Character:
         self.attack = attack
         self.defense = defense
         self.description = description
-        self.width = 200
-        self.height = 300
+        self.width, self.height = CHARACTER_SIZE
         self.selected = False
-        # 加载角色图片
-        self.image = load_image(os.path.join(CHARACTERS_DIR, f"{name.lower()}.png"), (self.width, self.height))
+        # 角色图片在第一次绘制时才加载
+        self.image_path = character_image_path(name)
+
+    @property
+    def image(self):
+        return load_image(self.image_path, (self.width, self.height))
 
     def draw(self, screen, x, y):
         color = GREEN if self.selected else WHITE
@@ -76,97 +158,97 @@ class Character:
         if self.image:
             screen.blit(self.image, (x, y))
         
-        font = get_font(24)
-        
-        # 创建带描边的文字
-        def draw_text_with_outline(text, pos, color=BLACK, outline_color=WHITE):
-            # 绘制描边
-            for dx, dy in [(-1,-1), (-1,1), (1,-1), (1,1)]:
-                outline = font.render(text, True, outline_color)
-                screen.blit(outline, (pos[0] + dx, pos[1] + dy))
-            # 绘制主文字
-            text_surface = font.render(text, True, color)
-            screen.blit(text_surface, pos)
-        
         # 绘制带描边的文字
-        draw_text_with_outline(self.name, (x + 10, y + 10))
-        draw_text_with_outline(f"生命: {self.health}", (x + 10, y + 40))
-        draw_text_with_outline(f"攻击: {self.attack}", (x + 10, y + 70))
-        draw_text_with_outline(f"防御: {self.defense}", (x + 10, y + 100))
-        draw_text_with_outline(self.description, (x + 10, y + 130))
+        draw_text_with_outline(screen, self.name, (x + 10, y + 10))
+        draw_text_with_outline(screen, f"生命: {self.health}", (x + 10, y + 40))
+        draw_text_with_outline(screen, f"攻击: {self.attack}", (x + 10, y + 70))
+        draw_text_with_outline(screen, f"防御: {self.defense}", (x + 10, y + 100))
+        draw_text_with_outline(screen, self.description, (x + 10, y + 130))
 
-class Monster:
+class Monster(Combatant):
     def __init__(self, name, health, attack, defense):
-        self.name = name
-        self.max_health = health
-        self.health = health
-        self.attack = attack
-        self.defense = defense
-        self.width = 150
-        self.height = 200
-        self.frozen = False
-        self.frozen_duration = 0
-        # 加载怪物图片
-        self.image = load_image(os.path.join(MONSTERS_DIR, f"{name.lower()}.png"), (self.width, self.height))
+        super().__init__(name, health, attack, defense)
+        self.width, self.height = MONSTER_SIZE
+        # 怪物图片在第一次绘制时才加载，之后所有同名怪物共享
+        self.image_path = monster_image_path(name)
+
+    @property
+    def image(self):
+        return load_image(self.image_path, (self.width, self.height))
 
     def draw(self, screen, x, y):
-        pygame.draw.rect(screen, RED, (x, y, self.width, self.height))
-        pygame.draw.rect(screen, BLACK, (x, y, self.width, self.height), 2)
-        
-        # 绘制怪物图片
-        if self.image:
-            screen.blit(self.image, (x, y))
+        draw_monster(screen, self, x, y)
+
+def draw_monster(screen, monster, x, y):
+    # 单个怪物对象和怪物群中的怪物（MonsterRef）共用同一套绘制
+    width, height = MONSTER_SIZE
+    pygame.draw.rect(screen, RED, (x, y, width, height))
+    pygame.draw.rect(screen, BLACK, (x, y, width, height), 2)
+    
+    # 绘制怪物图片，同名怪物共享
+    image = load_image(monster_image_path(monster.name), MONSTER_SIZE)
+    if image:
+        screen.blit(image, (x, y))
+    
+    # 使用带描边的文字渲染方法
+    draw_text_with_outline(screen, monster.name, (x + 10, y + 10))
+    draw_text_with_outline(screen, f"生命: {monster.health}/{monster.max_health}", (x + 10, y + 40))
+    draw_text_with_outline(screen, f"攻击: {monster.attack}", (x + 10, y + 70))
+    draw_text_with_outline(screen, f"防御: {monster.defense}", (x + 10, y + 100))
+
+def draw_monster_health_bar(screen, monster, bar):
+    pygame.draw.rect(screen, RED, bar)
+    current_width = int(bar.width * (monster.health / monster.max_health))
+    pygame.draw.rect(screen, GREEN, (bar.x, bar.y, current_width, bar.height))
+
+def definition_property(name):
+    # 卡牌数值保存在共享的卡牌定义中
+    return property(lambda self: getattr(self.definition, name))
+
+class Card(CardInstance):
+    __slots__ = ()
+    name = definition_property('name')
+    attack = definition_property('attack')
+    defense = definition_property('defense')
+    cost = definition_property('cost')
+    card_type = definition_property('card_type')  # normal, skill, buff
+    effect = definition_property('description')  # 卡牌效果描述
+
+    def draw(self, screen, x, y):
+        # 卡牌实例只有定义和选中状态，尺寸来自布局表
+        # 根据卡牌类型选择颜色
+        if self.card_type == "normal":
+            color = GREEN if self.selected else WHITE
+        elif self.card_type == "skill":
+            color = BLUE if self.selected else (200, 200, 255)
+        else:  # 默认颜色
+            color = WHITE if self.selected else (200, 200, 200)
+
+        width, height = HAND_CARD_SIZE
+        pygame.draw.rect(screen, color, (x, y, width, height))
+        pygame.draw.rect(screen, BLACK, (x, y, width, height), 2)
         
-        font = get_font(24)
+        # 绘制卡牌信息：手牌高度只够三行，有特殊效果时用效果描述代替卡牌类型（规则中没有费用）
+        font = get_font(20)
+        name_text = font.render(self.name, True, BLACK)
+        attack_text = font.render(f"伤害: {self.attack}", True, BLACK)
+        effect_text = font.render(self.effect or self.card_type, True, BLACK)
         
-        # 创建带描边的文字
-        def draw_text_with_outline(text, pos, color=BLACK, outline_color=WHITE):
-            # 绘制描边
-            for dx, dy in [(-1,-1), (-1,1), (1,-1), (1,1)]:
-                outline = font.render(text, True, outline_color)
-                screen.blit(outline, (pos[0] + dx, pos[1] + dy))
-            # 绘制主文字
-            text_surface = font.render(text, True, color)
-            screen.blit(text_surface, pos)
-            
-        # 使用带描边的文字渲染方法
-        draw_text_with_outline(self.name, (x + 10, y + 10))
-        draw_text_with_outline(f"生命: {self.health}/{self.max_health}", (x + 10, y + 40))
-        draw_text_with_outline(f"攻击: {self.attack}", (x + 10, y + 70))
-        draw_text_with_outline(f"防御: {self.defense}", (x + 10, y + 100))
-
-    def take_damage(self, damage):
-        actual_damage = max(1, damage - self.defense)
-        self.health = max(0, self.health - actual_damage)
-        return actual_damage
-
-    def attack_player(self, player):
-        if self.frozen:
-            self.frozen_duration -= 1
-            if self.frozen_duration <= 0:
-                self.frozen = False
-            return 0
-        damage = max(1, self.attack - player.defense)
-        player.health = max(0, player.health - damage)
-        return damage
-
-class Player:
-    def __init__(self, character=None):
-        self.character = character
-        self.max_health = character.max_health if character else 2000 # 默认最大生命值提高20倍
-        self.health = character.health if character else 2000      # 默认当前生命值提高20倍
-        self.attack = character.attack if character else 10
-        self.defense = character.defense if character else 5
-        self.gold = 50
-        self.luck = 1
-        self.strength = 1
-        self.agility = 1
+        screen.blit(name_text, (x + 5, y + 5))
+        screen.blit(attack_text, (x + 5, y + 35))
+        screen.blit(effect_text, (x + 5, y + 65))
+
+    def apply_effect(self, player, monster, effects):
+        return apply_card_effect(self.definition, player, monster, effects)
+
+class Player(PlayerState):
+    card_type = Card
+
+    def __init__(self, character=None, rng=None):
+        super().__init__(character, rng)
         self.selected_card = None
         self.dragging_card = None
         self.drag_start_pos = None
-        # 效果状态
-        self.thunder_effect = False
-        self.thunder_duration = 0
 
     def draw(self, screen):
         font = get_font(24)
@@ -194,265 +276,212 @@ class Player:
         current_width = int(width * (self.health / self.max_health))
         pygame.draw.rect(screen, GREEN, (x, y, current_width, height))
 
-class Card:
-    def __init__(self, name, attack, defense, cost, card_type="normal", effect=None):
-        self.name = name
-        self.attack = attack
-        self.defense = defense
-        self.cost = cost
-        self.width = 100
-        self.height = 150
-        self.selected = False
-        self.card_type = card_type  # normal, skill
-        self.effect = effect  # 卡牌效果
-        self.effect_duration = 0  # 效果持续回合数
-
-    def draw(self, screen, x, y):
-        # 根据卡牌类型选择颜色
-        if self.card_type == "normal":
-            color = GREEN if self.selected else WHITE
-        elif self.card_type == "skill":
-            color = BLUE if self.selected else (200, 200, 255)
-        else:  # 默认颜色
-            color = WHITE if self.selected else (200, 200, 200)
-
-        pygame.draw.rect(screen, color, (x, y, self.width, self.height))
-        pygame.draw.rect(screen, BLACK, (x, y, self.width, self.height), 2)
-        
-        # 绘制卡牌信息
-        font = get_font(20)
-        name_text = font.render(self.name, True, BLACK)
-        attack_text = font.render(f"伤害: {self.attack}", True, BLACK)
-        cost_text = font.render(f"费用: {self.cost}", True, BLACK)
-        type_text = font.render(self.card_type, True, BLACK)
-        
-        screen.blit(name_text, (x + 5, y + 5))
-        screen.blit(attack_text, (x + 5, y + 30))
-        screen.blit(cost_text, (x + 5, y + 55))
-        screen.blit(type_text, (x + 5, y + 80))
+class ScratchCard:
+    # 刮刮卡：每场战斗胜利后在增益选择界面刮开一张，奖励由规则核心抽取并加入玩家牌库，这里只负责显示
+    def __init__(self, rect):
+        self.rect = rect
 
-        # 如果有特殊效果，显示效果描述
-        if self.effect:
-            effect_text = font.render(self.effect, True, BLACK)
-            screen.blit(effect_text, (x + 5, y + 105))
+    def draw(self, screen, pending, reward):
+        if pending:
+            pygame.draw.rect(screen, BLUE, self.rect)
+            pygame.draw.rect(screen, BLACK, self.rect, 2)
+            text = get_font(20).render("点击刮开", True, WHITE)
+            screen.blit(text, text.get_rect(center=self.rect.center))
+        elif reward is not None:
+            pygame.draw.rect(screen, WHITE, self.rect)
+            pygame.draw.rect(screen, BLACK, self.rect, 2)
+            text = get_font(24).render(reward.name, True, BLACK)
+            screen.blit(text, (self.rect.x + 10, self.rect.y + 40))
 
-    def apply_effect(self, player, monster):
-        if self.card_type == "normal":
-            return self.attack
-        elif self.card_type == "skill":
-            if "雷" in self.name:
-                player.thunder_effect = True
-                player.thunder_duration = 2
-                return self.attack
-            elif "冰" in self.name:
-                monster.frozen = True
-                monster.frozen_duration = 1
-                return self.attack
-        return 0
+def rules_property(name):
+    # 游戏状态保存在规则核心中，界面只是读写代理
+    def getter(self):
+        return getattr(self.rules, name)
+    def setter(self, value):
+        setattr(self.rules, name, value)
+    return property(getter, setter)
 
-class ScratchCard:
-    def __init__(self, x, y, player):
-        self.x = x
-        self.y = y
-        self.width = 150
-        self.height = 100
-        self.revealed = False
-        self.player = player
-        self.reward = self.generate_reward()
-        self.scratched = False
-
-    def generate_reward(self):
-        # 根据玩家幸运值调整奖励概率
-        rand = random.random() * self.player.luck
-        if rand < 0.1:  # 10% 概率获得技能卡
-            return self.generate_skill_card()
-        elif rand < 0.3:  # 20% 概率获得重击
-            return Card("重击", 10, 0, 2, "normal")
-        else:  # 40% 概率获得普通攻击
-            return Card("普通攻击", 5, 0, 1, "normal")
-
-    def generate_skill_card(self):
-        if random.random() < 0.5:  # 50% 概率获得雷属性
-            return Card("雷击", 5, 0, 3, "skill", "后续2回合+3伤害")
-        else:  # 50% 概率获得冰属性
-            return Card("冰冻", 0, 0, 3, "skill", "怪物停止1回合")
+class Game:
+    game_state = rules_property('game_state')
+    player = rules_property('player')
+    monster = rules_property('monster')
+    current_character = rules_property('current_character')
+    battle_round = rules_property('battle_round')
+    player_turn = rules_property('player_turn')
+    goblins_defeated = rules_property('goblins_defeated')
 
-    def draw(self, screen):
-        if not self.scratched:
-            pygame.draw.rect(screen, BLUE, (self.x, self.y, self.width, self.height))
-            pygame.draw.rect(screen, BLACK, (self.x, self.y, self.width, self.height), 2)
+    def __init__(self, render_mode='dirty', seed=None, recorder=None, headless=False, startup_report=False,
+                 wave_size=DEFAULT_WAVE_SIZE, snapshot_path=None, profile=False, profile_csv=None,
+                 leaderboard_path=None, player_name=None):
+        # headless 模式不创建窗口、不加载图片，用于回放和自动测试
+        self.headless = headless
+        self.startup_report = startup_report
+        if headless:
+            self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
         else:
-            pygame.draw.rect(screen, WHITE, (self.x, self.y, self.width, self.height))
-            pygame.draw.rect(screen, BLACK, (self.x, self.y, self.width, self.height), 2)
-            font = get_font(24)
-            text = font.render(self.reward.name, True, BLACK)
-            screen.blit(text, (self.x + 10, self.y + 40))
-
-    def scratch(self, pos):
-        if not self.scratched and self.x <= pos[0] <= self.x + self.width and self.y <= pos[1] <= self.y + self.height:
-            self.scratched = True
-            return self.reward
-        return None
-
-class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("卡牌冒险")
+            # 只初始化用到的显示和字体模块，不启动音频等其他子系统
+            pygame.display.init()
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("卡牌冒险")
+            STARTUP.mark('display')
+            FONTS.preload() # 启动时解析字体路径并预加载常用字号
+            STARTUP.mark('fonts')
         self.clock = pygame.time.Clock()
         self.running = True
         
-        # 加载背景图片
-        self.backgrounds = {
-            'menu': load_image(os.path.join(BACKGROUNDS_DIR, 'menu.jpg'), (SCREEN_WIDTH, SCREEN_HEIGHT)),
-            'battle': load_image(os.path.join(BACKGROUNDS_DIR, 'battle.jpg'), (SCREEN_WIDTH, SCREEN_HEIGHT)),
-            'buff': load_image(os.path.join(BACKGROUNDS_DIR, 'buff.jpg'), (SCREEN_WIDTH, SCREEN_HEIGHT)),
-            'game_over': load_image(os.path.join(BACKGROUNDS_DIR, 'game_over.jpg'), (SCREEN_WIDTH, SCREEN_HEIGHT)) # 新增游戏结束背景
-        }
+        # 所有随机结果都来自这个种子，记录种子和操作即可复现整局
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.recorder = recorder
+        if recorder is not None:
+            recorder.start(self.seed, wave_size)
         
-        # 游戏状态
-        self.game_state = GAME_STATE['SELECT_CHARACTER']
-        self.player = None
-        self.monster = None
-        self.characters = [
-            Character("战士", 2400, 15, 8, "高生命值，中等攻击"), # 120 * 20
-            Character("法师", 1600, 20, 5, "高攻击，低防御"),   # 80 * 20
-            Character("游侠", 2000, 12, 10, "平衡型角色")     # 100 * 20
-        ]
-        self.current_character = None
-        self.battle_round = 0
-        self.player_turn = True
-        self.goblins_defeated = 0  # 哥布林击杀计数器
+        # 渲染模式：dirty 只更新变化区域，full 为整屏重绘的备用路径
+        if render_mode not in RENDER_MODES:
+            raise ValueError(f"未知的渲染模式: {render_mode}")
+        self.render_mode = render_mode
+        self.dirty = DirtyRegionTracker(self.screen.get_rect())
+        self.drawn_state = None
+        
+        # 后台图片加载，run() 开始时才创建；没有加载器时图片在第一次使用时同步加载
+        self.loader = None
         
-        # 定义事件按钮
-        self.event_buttons = {
-            'risk': pygame.Rect(50, 400, 120, 40),      # 风险型
-            'balance': pygame.Rect(190, 400, 120, 40),  # 均衡型
-            'safe': pygame.Rect(330, 400, 120, 40),     # 稳健型
-            'all_in': pygame.Rect(470, 400, 120, 40),   # 梭哈
-            'scratch': pygame.Rect(610, 400, 120, 40)   # 刮痧
-        }
+        # 最优策略表，首帧显示后才加载（需要NumPy）；没有生成策略表时不显示提示
+        self.policies = None
+        # 固定策略的精确胜率计算，同样在首帧显示后才加载；玩家回合的状态变化时在后台线程计算，绘制只读取结果
+        self.outcomes = None
+        self.outcome_worker = None
+        self.win_chance_key = None
+        self.win_chance_future = None
+        
+        # 性能分析：默认关闭，F3 或命令行参数开启后才记录
+        self.profiler = None
+        self.show_profiler = profile
+        self.profile_csv = profile_csv
+        if profile or profile_csv:
+            self.enable_profiler()
+        
+        # 游戏状态由规则核心驱动
+        rng = random.Random(self.seed)
+        if headless:
+            self.backgrounds = {}
+            self.rules = GameRules(rng=rng, wave_size=wave_size)
+            self.characters = self.rules.characters
+        else:
+            # 背景图片在对应界面第一次显示时才加载
+            self.backgrounds = LazyImages(ASSETS, {
+                'menu': (os.path.join(BACKGROUNDS_DIR, 'menu.jpg'), (SCREEN_WIDTH, SCREEN_HEIGHT)),
+                'battle': (os.path.join(BACKGROUNDS_DIR, 'battle.jpg'), (SCREEN_WIDTH, SCREEN_HEIGHT)),
+                'buff': (os.path.join(BACKGROUNDS_DIR, 'buff.jpg'), (SCREEN_WIDTH, SCREEN_HEIGHT)),
+                'game_over': (os.path.join(BACKGROUNDS_DIR, 'game_over.jpg'), (SCREEN_WIDTH, SCREEN_HEIGHT)) # 新增游戏结束背景
+            })
+            self.characters = [Character(*stats) for stats in CHARACTERS]
+            self.rules = GameRules(rng=rng, characters=self.characters, monster_factory=Monster, player_factory=Player,
+                                   wave_size=wave_size)
         
         # 增益效果卡牌
-        self.buff_cards = [
-            Card("力量提升", 0, 0, 0, "buff", "攻击力+2"),
-            Card("防御提升", 0, 0, 0, "buff", "防御力+2"),
-            Card("生命恢复", 0, 0, 0, "buff", "恢复20点生命")
-        ]
+        self.buff_cards = [Card(definition) for definition in default_registry().of_type("buff")]
+        
+        # 布局表：绘制和点击判定共用同一组矩形
+        self.layout = Layout((SCREEN_WIDTH, SCREEN_HEIGHT), len(self.characters), len(self.buff_cards))
+        self.event_buttons = self.layout.event_buttons
+        self.restart_button = self.layout.restart_button
+        self.scratch_card = ScratchCard(self.layout.scratch_card_rect)
+        self.layout.set_battle(min(wave_size, MAX_MONSTER_SLOTS), 0)
+        
+        # 快照：启动时恢复上次的进度，之后每个回合边界在后台线程保存
+        self.snapshots = None
+        self.snapshot_key = None
+        if snapshot_path:
+            self.restore_snapshot(snapshot_path)
+            self.snapshots = SnapshotWriter(snapshot_path)
+        
+        # 排行榜：每局结束时记录成绩，写入在后台线程批量完成；已有排名在首帧显示后读入内存缓存
+        self.leaderboard = None
+        if leaderboard_path:
+            from leaderboard import Leaderboard # 不记录成绩时不需要加载SQLite
+            self.leaderboard = Leaderboard(leaderboard_path, player_name, wave_size)
+        # 从快照恢复到游戏结束界面时，这一局已经记录过
+        self.run_recorded = self.game_state == GAME_STATE['GAME_OVER']
         
-        # 游戏结束界面的重新开始按钮
-        self.restart_button = pygame.Rect(SCREEN_WIDTH // 2 - 75, SCREEN_HEIGHT // 2 + 50, 150, 50)
+        # 每个状态的静态层，进入该状态时烘焙一次
+        self.layers = StaticLayerCache(self.screen.get_size())
+        self.layers.register(GAME_STATE['SELECT_CHARACTER'], self.bake_character_selection)
+        self.layers.register(GAME_STATE['BATTLE'], self.bake_battle)
+        self.layers.register(GAME_STATE['BUFF_SELECTION'], self.bake_buff_selection)
+        self.layers.register(GAME_STATE['GAME_OVER'], self.bake_game_over)
 
     def create_monster(self):
         # 哥布林血量随击杀数增加，基础50，每击杀一只+50
-        monster_health = 50 + (self.goblins_defeated * 50)
-        return Monster("哥布林", monster_health, 8, 3)
+        return self.rules.create_monster()
 
     def start_battle(self):
-        self.monster = self.create_monster()
-        self.battle_round = 1
-        self.player_turn = True
+        self.rules.start_battle()
 
     def handle_character_selection(self, pos):
-        for i, character in enumerate(self.characters):
-            x = 50 + i * 250
-            y = 150
-            if x <= pos[0] <= x + character.width and y <= pos[1] <= y + character.height:
-                self.current_character = character
-                self.player = Player(character)
-                self.goblins_defeated = 0 # 新游戏开始，重置击杀计数
-                self.game_state = GAME_STATE['BATTLE']
-                self.start_battle()
+        hit = self.layout.hit_test(GAME_STATE['SELECT_CHARACTER'], pos)
+        if hit:
+            self.perform(('select', hit[1]))
 
     def handle_battle_events(self, pos):
         if self.player_turn:
             # 检查是否点击了事件按钮
-            for event_type, button in self.event_buttons.items():
-                if button.collidepoint(pos):
-                    self.trigger_event(event_type)
-                    self.player_turn = False
-                    break
+            hit = self.layout.hit_test(GAME_STATE['BATTLE'], pos)
+            if hit and hit[0] == 'event':
+                self.trigger_event(hit[1])
+            elif hit and hit[0] == 'card':
+                # 按下手牌开始拖动，松开时落在怪物上才打出
+                card = self.player_hand[hit[1]]
+                card.selected = True
+                self.player.dragging_card = card
 
     def trigger_event(self, event_type):
-        if event_type == 'risk':
-            # 风险型：75%概率扣30血，25%概率怪物扣50血
-            if random.random() < 0.75:
-                self.player.health = max(0, self.player.health - 30)
-            else:
-                self.monster.take_damage(50)
-        elif event_type == 'balance':
-            # 均衡型：50%概率扣20血，50%概率怪物扣20血
-            if random.random() < 0.5:
-                self.player.health = max(0, self.player.health - 20)
-            else:
-                self.monster.take_damage(20)
-        elif event_type == 'safe':
-            # 稳健型：25%概率扣10血，75%概率怪物扣10血
-            if random.random() < 0.25:
-                self.player.health = max(0, self.player.health - 10)
-            else:
-                self.monster.take_damage(10)
-        elif event_type == 'all_in':
-            # 梭哈：90%概率扣50血，10%概率怪物扣100血
-            if random.random() < 0.9:
-                self.player.health = max(0, self.player.health - 50)
-            else:
-                self.monster.take_damage(100)
-        elif event_type == 'scratch':
-            # 刮痧：100%概率怪物扣1血
-            self.monster.take_damage(1)
+        # 概率事件的结算规则见 engine.EVENT_TABLE
+        self.perform(('event', event_type))
+
+    def perform(self, action):
+        # 所有改变规则状态的玩家操作都经过这里，便于录制
+        if self.recorder is not None:
+            self.recorder.record(action)
+        self.rules.apply_action(action)
+
+    @property
+    def player_hand(self):
+        return self.player.deck.hand
 
     def handle_card_drop(self, pos):
-        if self.player.dragging_card:
+        card = self.player.dragging_card
+        if card:
+            card.selected = False
             # 检查是否拖到怪物区域
-            monster_x = 500
-            monster_y = 100
-            if (monster_x <= pos[0] <= monster_x + self.monster.width and 
-                monster_y <= pos[1] <= monster_y + self.monster.height):
-                # 使用卡牌攻击怪物
-                damage = self.player.dragging_card.apply_effect(self.player, self.monster)
-                if damage > 0:
-                    self.monster.take_damage(damage)
-                # 如果玩家有雷属性效果，增加额外伤害
-                if self.player.thunder_effect:
-                    self.monster.take_damage(3)
-                    self.player.thunder_duration -= 1
-                    if self.player.thunder_duration <= 0:
-                        self.player.thunder_effect = False
-                self.player_hand.remove(self.player.dragging_card)
-                self.player_turn = False
+            hit = self.layout.hit_test(GAME_STATE['BATTLE'], pos)
+            if hit and hit[0] == 'monster':
+                # 使用卡牌攻击怪物，打出的卡牌进入弃牌堆
+                self.perform(('card', self.player_hand.index(card)))
             self.player.dragging_card = None
             self.player.drag_start_pos = None
 
     def handle_buff_selection(self, pos):
         # 处理增益卡牌选择
-        for i, card in enumerate(self.buff_cards):
-            card_x = 50 + i * 250
-            card_y = 200
-            if card_x <= pos[0] <= card_x + card.width and card_y <= pos[1] <= card_y + card.height:
-                # 应用增益效果
-                if "力量" in card.name:
-                    self.player.attack += 2
-                elif "防御" in card.name:
-                    self.player.defense += 2
-                elif "生命" in card.name:
-                    self.player.health = min(self.player.max_health, self.player.health + 20)
-                # 返回战斗状态
-                self.game_state = GAME_STATE['BATTLE']
-                self.start_battle()
+        hit = self.layout.hit_test(GAME_STATE['BUFF_SELECTION'], pos)
+        if hit and hit[0] == 'scratch_card':
+            if self.rules.scratch_card_pending:
+                self.perform(('scratch_card',))
+        elif hit:
+            card = self.buff_cards[hit[1]]
+            # 应用增益效果并返回战斗状态
+            self.perform(('buff', card.definition.param))
 
     def restart_game(self):
-        self.game_state = GAME_STATE['SELECT_CHARACTER']
-        self.player = None
-        self.monster = None
-        self.current_character = None
-        self.battle_round = 0
-        self.player_turn = True
-        # goblins_defeated 会在选择角色时重置
-
-    def handle_events(self):
-        for event in pygame.event.get():
+        self.perform(('restart',))
+
+    def handle_events(self, events=None):
+        if events is None:
+            events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type in MOUSE_EVENTS and not self.screen_ready():
+                continue # 当前界面的图片还没加载完，忽略鼠标操作
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if self.game_state == GAME_STATE['SELECT_CHARACTER']:
                     self.handle_character_selection(event.pos)
@@ -461,7 +490,7 @@ class Game:
                 elif self.game_state == GAME_STATE['BUFF_SELECTION']:
                     self.handle_buff_selection(event.pos)
                 elif self.game_state == GAME_STATE['GAME_OVER']:
-                    if self.restart_button.collidepoint(event.pos):
+                    if self.layout.hit_test(GAME_STATE['GAME_OVER'], event.pos):
                         self.restart_game()
             elif event.type == pygame.MOUSEBUTTONUP:
                 if self.game_state == GAME_STATE['BATTLE'] and hasattr(self.player, 'dragging_card') and self.player.dragging_card:
@@ -469,43 +498,184 @@ class Game:
             elif event.type == pygame.MOUSEMOTION:
                 if self.game_state == GAME_STATE['BATTLE'] and hasattr(self.player, 'dragging_card') and self.player.dragging_card:
                     self.player.drag_start_pos = event.pos
+            elif event.type == pygame.VIDEORESIZE:
+                self.layers.resize(self.screen.get_size()) # 窗口尺寸变化，静态层需要重新烘焙
+                self.dirty.mark_all()
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.dirty.mark_all() # 窗口被遮挡后重新显示，需要整屏重绘
+            elif event.type == pygame.KEYDOWN and event.key == PROFILER_KEY:
+                self.toggle_profiler()
 
     def update(self):
-        if self.game_state == GAME_STATE['BATTLE']:
-            if not self.player_turn and self.monster:
-                # 怪物回合
-                if not self.monster.frozen: # 确保怪物没被冰冻
-                    damage = self.monster.attack_player(self.player)
-                else:
-                    self.monster.frozen_duration -=1
-                    if self.monster.frozen_duration <= 0:
-                        self.monster.frozen = False
-                self.player_turn = True
-                
-                # 检查战斗是否结束
-                if self.player.health <= 0:
-                    self.game_state = GAME_STATE['GAME_OVER']
-                elif self.monster.health <= 0:
-                    self.goblins_defeated += 1 # 击杀数增加
-                    self.game_state = GAME_STATE['BUFF_SELECTION']
+        # 怪物回合和战斗结束判定
+        self.rules.update()
+        if self.loader is not None:
+            self.loader.poll() # 在主线程把后台解码好的图片转换成显示格式
+        if self.outcomes is not None:
+            self.update_win_chances()
+        if self.game_state == GAME_STATE['BATTLE'] and not self.headless:
+            self.sync_hand()
+        if self.snapshots is not None:
+            self.save_snapshot()
+        if self.leaderboard is not None:
+            self.record_run()
+
+    def record_run(self):
+        # 进入游戏结束界面时记录一次本局成绩
+        over = self.game_state == GAME_STATE['GAME_OVER']
+        if over and not self.run_recorded:
+            self.leaderboard.record(self.rules)
+        self.run_recorded = over
+
+    def sync_hand(self):
+        # 补牌由规则核心在玩家回合开始时完成；手牌数量变化时重建手牌位置
+        if len(self.layout.hand_rects) != len(self.player_hand):
+            self.layout.set_battle(len(self.layout.monster_rects), len(self.player_hand))
+
+    def save_snapshot(self):
+        # 状态、回合数、击杀数或刮刮卡变化即为回合边界；序列化只需几微秒，写盘在后台完成
+        key = (self.game_state, self.battle_round, self.goblins_defeated, self.rules.scratch_card_pending)
+        if key != self.snapshot_key:
+            self.snapshot_key = key
+            self.snapshots.submit(dump_rules(self.rules))
+
+    def restore_snapshot(self, path):
+        if not os.path.exists(path):
+            return False
+        try:
+            load_rules(self.rules, read_snapshot(path))
+        except (OSError, ValueError) as e:
+            print(f"无法恢复快照: {path}: {e}")
+            self.rules.restart()
+            return False
+        self.snapshot_key = (self.game_state, self.battle_round, self.goblins_defeated, self.rules.scratch_card_pending)
+        return True
+
+    def close(self):
+        if self.loader is not None:
+            self.loader.close()
+        if self.outcome_worker is not None:
+            self.outcome_worker.shutdown(wait=False, cancel_futures=True)
+        if self.snapshots is not None:
+            self.snapshots.close()
+        if self.leaderboard is not None:
+            self.leaderboard.close()
+        if self.profiler is not None:
+            if self.profile_csv:
+                state_names = {value: name for name, value in GAME_STATE.items()}
+                self.profiler.write_csv(self.profile_csv, state_names)
+            self.profiler.uninstall()
+
+    def enable_profiler(self):
+        if self.profiler is None:
+            self.profiler = FrameProfiler()
+            self.profiler.install(FONTS)
+        return self.profiler
+
+    def toggle_profiler(self):
+        # 第一次打开浮层时才开始记录，之后一直记录以便导出
+        self.show_profiler = not self.show_profiler
+        if self.show_profiler:
+            self.enable_profiler()
+        self.dirty.mark_all()
 
     def draw(self):
-        # 绘制背景
-        current_bg_key = 'menu' # 默认背景
-        if self.game_state == GAME_STATE['SELECT_CHARACTER']:
-            current_bg_key = 'menu'
-        elif self.game_state == GAME_STATE['BATTLE']:
-            current_bg_key = 'battle'
+        if not self.screen_ready():
+            self.draw_loading()
+        elif self.render_mode == 'dirty':
+            self.draw_dirty()
+        else:
+            self.draw_scene()
+            self.present()
+
+    def draw_loading(self):
+        # 进度界面只用纯色和文字，不需要任何图片；进度变化时才重绘
+        done, total = self.loader.progress(self.game_state)
+        if self.drawn_state == ('loading', self.game_state, done):
+            return
+        # 加载完成后 draw_dirty 看到界面变化，会重新登记区域并整屏重绘
+        self.drawn_state = ('loading', self.game_state, done)
+        self.screen.fill(WHITE)
+        draw_text_with_outline(self.screen, f"加载中... {done}/{total}",
+                               (LOADING_BAR_RECT.x, LOADING_BAR_RECT.y - 40), 28)
+        pygame.draw.rect(self.screen, BLACK, LOADING_BAR_RECT, 2)
+        bar = LOADING_BAR_RECT.inflate(-6, -6)
+        bar.width = bar.width * done // total
+        pygame.draw.rect(self.screen, GREEN, bar)
+        self.present()
+
+    def present(self, rects=None):
+        # 把画面提交到屏幕：整屏 flip 或只更新变化区域
+        start = time.perf_counter() if self.profiler is not None else 0.0
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+        if self.profiler is not None:
+            self.profiler.add('present', start)
+
+    def draw_dirty(self):
+        # 切换界面时重新登记该界面会变化的区域，并整屏重绘一次
+        if self.game_state != self.drawn_state:
+            self.drawn_state = self.game_state
+            self.track_regions()
+            self.dirty.mark_all()
+        if self.show_profiler:
+            self.dirty.mark(PROFILER_RECT) # 浮层每帧刷新
+        
+        rects = self.dirty.collect()
+        if not rects:
+            return # 没有变化，本帧不绘制也不提交
+        
+        # 只在变化区域内重绘，其余像素保持不变
+        self.screen.set_clip(rects[0].unionall(rects[1:]))
+        self.draw_scene()
+        self.screen.set_clip(None)
+        self.present(rects)
+
+    def track_regions(self):
+        self.dirty.clear_regions()
+        if self.game_state == GAME_STATE['BATTLE']:
+            player = self.player
+            # 玩家属性块和血条
+            self.dirty.track('player_stats', self.layout.player_panel.union(self.layout.player_health_bar), lambda: (
+                player.health, player.max_health, player.attack, player.defense,
+                player.gold, player.luck, player.strength, player.agility))
+            # 怪物面板和怪物血条
+            if self.rules.monsters is not None:
+                # 怪物群的任何数值变化都会增加版本号
+                self.dirty.track('monster', self.layout.monster_area(), lambda: self.rules.monsters.version)
+            else:
+                self.dirty.track('monster', self.layout.monster_rect.union(self.layout.monster_health_bar()), lambda: (
+                    self.monster, self.monster.health, self.monster.max_health,
+                    self.monster.attack, self.monster.defense) if self.monster else None)
+            # 推荐事件的按钮边框
+            hint_area = self.layout.event_buttons_area().inflate(2 * HINT_BORDER, 2 * HINT_BORDER)
+            self.dirty.track('hint', hint_area, self.recommended_event)
+            # 各事件的胜率
+            self.dirty.track('win_chance', self.layout.win_chance_area(), self.win_chances)
+            # 手牌和正在拖动的卡牌
+            self.dirty.track('hand', self.layout.hand_area(), lambda: (
+                self.player.deck.version, self.player.dragging_card))
+            # 回合提示
+            self.dirty.track('turn_banner', (SCREEN_WIDTH//2 - 100, 35, 200, 60), lambda: self.player_turn)
+            # 击败数量
+            self.dirty.track('defeated', (SCREEN_WIDTH - 250, 5, 245, 40), lambda: self.goblins_defeated)
         elif self.game_state == GAME_STATE['BUFF_SELECTION']:
-            current_bg_key = 'buff'
+            self.dirty.track('scratch_card', self.layout.scratch_card_rect, lambda: (
+                self.rules.scratch_card_pending, self.rules.scratch_card_reward))
         elif self.game_state == GAME_STATE['GAME_OVER']:
-            current_bg_key = 'game_over'
-            
-        if self.backgrounds.get(current_bg_key) and self.backgrounds[current_bg_key]:
-            self.screen.blit(self.backgrounds[current_bg_key], (0,0))
-        else:
-            self.screen.fill(WHITE) # 图片不存在则填充白色
+            self.dirty.track('score', (0, SCREEN_HEIGHT//2 - 20, SCREEN_WIDTH, 60), lambda: self.goblins_defeated)
+            if self.leaderboard is not None:
+                # 排名只在内存缓存变化时重绘
+                self.dirty.track('rankings', RANKINGS_RECT, lambda: self.leaderboard.cache.version)
+
+    def draw_scene(self):
+        # 静态层：背景、底板、按钮、标题等不变的内容
+        self.screen.blit(self.layers.get(self.game_state), (0, 0))
         
+        profiler = self.profiler
+        start = time.perf_counter() if profiler is not None else 0.0
         if self.game_state == GAME_STATE['SELECT_CHARACTER']:
             self.draw_character_selection()
         elif self.game_state == GAME_STATE['BATTLE']:
@@ -514,195 +684,406 @@ class Game:
             self.draw_buff_selection()
         elif self.game_state == GAME_STATE['GAME_OVER']:
             self.draw_game_over()
-        
-        pygame.display.flip()
+        if profiler is not None:
+            profiler.add('draw_state', start)
+            if self.show_profiler:
+                self.draw_profiler_overlay()
 
-    def draw_character_selection(self):
-        font = get_font(36)
-        title = font.render("选择你的角色", True, BLACK)
+    def draw_profiler_overlay(self):
+        # 浮层自身的绘制不计入表面和文字渲染次数，耗时也不计入绘制阶段和整帧
+        profiler = self.profiler
+        start = time.perf_counter()
+        profiler.counting = False
+        summary = profiler.latest_summary()
+        self.screen.blit(self.layers.panel(PROFILER_RECT.size, BLACK, 180), PROFILER_RECT.topleft)
+        font = get_font(14)
+        lines = [
+            f"帧耗时 p50 {summary['frame_p50_ms']:.2f}ms  p99 {summary['frame_p99_ms']:.2f}ms",
+            f"事件 {summary['events_mean_ms']:.2f}  更新 {summary['update_mean_ms']:.2f}  "
+            f"绘制 {summary['draw_mean_ms']:.2f}  提交 {summary['present_mean_ms']:.2f}",
+            f"表面 {summary['surfaces']}  文字渲染 {summary['font_renders']}  帧数 {summary['frames']}",
+        ]
+        for i, line in enumerate(lines):
+            self.screen.blit(font.render(line, True, WHITE), (PROFILER_RECT.x + 8, PROFILER_RECT.y + 6 + i * 18))
+        profiler.counting = True
+        profiler.exclude(start)
+
+    def bake_background(self, surface, state):
+        background = self.backgrounds.get(BACKGROUND_KEYS[state])
+        if background:
+            surface.blit(background, (0, 0))
+        else:
+            surface.fill(WHITE) # 图片不存在则填充白色
+
+    def bake_character_selection(self, surface):
+        self.bake_background(surface, GAME_STATE['SELECT_CHARACTER'])
+        # 合成后的描边标题四周各多1像素
+        title = TEXT_CACHE.render("选择你的角色", 36, BLACK, WHITE)
+        title_width = title.get_width() - 2
+        title_height = title.get_height() - 2
         # 添加标题背景
-        title_bg = pygame.Surface((title.get_width() + 20, title.get_height() + 10))
-        title_bg.fill(WHITE)
-        title_bg.set_alpha(200)  # 设置半透明
-        self.screen.blit(title_bg, (SCREEN_WIDTH//2 - title.get_width()//2 - 10, 40))
+        title_bg = self.layers.panel((title_width + 20, title_height + 10), WHITE, 200)  # 设置半透明
+        surface.blit(title_bg, (SCREEN_WIDTH//2 - title_width//2 - 10, 40))
         
         # 绘制带描边的标题
-        def draw_title_with_outline(text, pos, color=BLACK, outline_color=WHITE):
-            # 绘制描边
-            for dx, dy in [(-1,-1), (-1,1), (1,-1), (1,1)]:
-                outline = font.render(text, True, outline_color)
-                self.screen.blit(outline, (pos[0] + dx, pos[1] + dy))
-            # 绘制主文字
-            text_surface = font.render(text, True, color)
-            self.screen.blit(text_surface, pos)
+        draw_text_with_outline(surface, "选择你的角色", (SCREEN_WIDTH//2 - title_width//2, 50), 36)
         
-        draw_title_with_outline("选择你的角色", (SCREEN_WIDTH//2 - title.get_width()//2, 50))
-        
-        for i, character in enumerate(self.characters):
+        for character, rect in zip(self.characters, self.layout.character_rects):
             # 添加角色信息背景
-            info_bg = pygame.Surface((character.width, character.height))
-            info_bg.fill(WHITE)
-            info_bg.set_alpha(180)  # 设置半透明
-            self.screen.blit(info_bg, (50 + i * 250, 150))
-            
+            info_bg = self.layers.panel(rect.size, WHITE, 180)  # 设置半透明
+            surface.blit(info_bg, rect.topleft)
+
+    def draw_character_selection(self):
+        for character, rect in zip(self.characters, self.layout.character_rects):
             # 绘制角色
-            character.draw(self.screen, 50 + i * 250, 150)
+            character.draw(self.screen, rect.x, rect.y)
 
-    def draw_battle(self):
-        # 绘制玩家属性
+    def bake_battle(self, surface):
+        self.bake_background(surface, GAME_STATE['BATTLE'])
         # 添加属性信息背景
-        attr_bg = pygame.Surface((200, 150))
-        attr_bg.fill(WHITE)
-        attr_bg.set_alpha(180)
-        self.screen.blit(attr_bg, (10, 10))
-        
-        self.player.draw(self.screen)
-        self.player.draw_health_bar(self.screen, 10, 150, 200, 20)
-        
-        # 绘制怪物
-        if self.monster:
-            # 添加怪物信息背景
-            monster_bg = pygame.Surface((self.monster.width, self.monster.height))
-            monster_bg.fill(WHITE)
-            monster_bg.set_alpha(180)
-            self.screen.blit(monster_bg, (500, 100))
-            
-            self.monster.draw(self.screen, 500, 100)
-            # 绘制怪物血条
-            pygame.draw.rect(self.screen, RED, (500, 80, 150, 10))
-            current_width = int(150 * (self.monster.health / self.monster.max_health))
-            pygame.draw.rect(self.screen, GREEN, (500, 80, current_width, 10))
+        surface.blit(self.layers.panel(self.layout.player_panel.size, WHITE, 180), self.layout.player_panel.topleft)
+        # 添加怪物信息背景（与怪物卡面同尺寸）
+        for rect in self.layout.monster_rects:
+            surface.blit(self.layers.panel(rect.size, WHITE, 180), rect.topleft)
         
-        # 显示回合信息
         font_large = get_font(24)
         font_small = get_font(14) # 用于说明文字的较小字体
-        turn_text = font_large.render("你的回合" if self.player_turn else "怪物回合", True, BLACK)
-        turn_bg = pygame.Surface((turn_text.get_width() + 20, turn_text.get_height() + 10))
-        turn_bg.fill(WHITE)
-        turn_bg.set_alpha(180)
-        self.screen.blit(turn_bg, (SCREEN_WIDTH//2 - turn_text.get_width()//2 - 10, 40))
-        self.screen.blit(turn_text, (SCREEN_WIDTH//2 - turn_text.get_width()//2, 50))
-
-        # 显示击败哥布林数量
-        defeated_text = font_small.render(f"已击败哥布林: {self.goblins_defeated}", True, BLACK)
-        defeated_bg = pygame.Surface((defeated_text.get_width() + 10, defeated_text.get_height() + 5))
-        defeated_bg.fill(WHITE)
-        defeated_bg.set_alpha(180)
-        self.screen.blit(defeated_bg, (SCREEN_WIDTH - defeated_text.get_width() - 20, 10))
-        self.screen.blit(defeated_text, (SCREEN_WIDTH - defeated_text.get_width() - 15, 12))
-
-        # 绘制事件按钮及说明
-        button_colors = {
-            'risk': (255, 0, 0),      # 红色
-            'balance': (255, 165, 0),  # 橙色
-            'safe': (0, 255, 0),      # 绿色
-            'all_in': (128, 0, 128),  # 紫色
-            'scratch': (0, 0, 255)    # 蓝色
-        }
-        
-        button_texts = {
-            'risk': "风险型",
-            'balance': "均衡型",
-            'safe': "稳健型",
-            'all_in': "梭哈",
-            'scratch': "刮痧"
-        }
-        
-        button_descriptions = {
-            'risk': ["75%几率自身-30HP", "25%几率怪物-50HP"],
-            'balance': ["50%几率自身-20HP", "50%几率怪物-20HP"],
-            'safe': ["25%几率自身-10HP", "75%几率怪物-10HP"],
-            'all_in': ["90%几率自身-50HP", "10%几率怪物-100HP"],
-            'scratch': ["100%几率怪物-1HP"]
-        }
-        
         for event_type, button in self.event_buttons.items():
             # 绘制按钮背景
-            pygame.draw.rect(self.screen, button_colors[event_type], button)
-            pygame.draw.rect(self.screen, BLACK, button, 2)
+            pygame.draw.rect(surface, BUTTON_COLORS[event_type], button)
+            pygame.draw.rect(surface, BLACK, button, 2)
             
             # 绘制按钮文字
-            text = font_large.render(button_texts[event_type], True, WHITE)
+            text = font_large.render(BUTTON_TEXTS[event_type], True, WHITE)
             text_rect = text.get_rect(center=button.center)
-            self.screen.blit(text, text_rect)
+            surface.blit(text, text_rect)
             
             # 绘制按钮说明 (支持换行)
-            desc_lines = button_descriptions[event_type]
             line_y_offset = 0
-            for line in desc_lines:
+            for line in BUTTON_DESCRIPTIONS[event_type]:
                 desc_text_surface = font_small.render(line, True, BLACK)
                 desc_text_rect = desc_text_surface.get_rect(center=(button.centerx, button.bottom + 20 + line_y_offset))
                 
                 # 添加说明文字背景
                 desc_bg_width = desc_text_surface.get_width() + 10
                 desc_bg_height = desc_text_surface.get_height() + 4
-                desc_bg = pygame.Surface((desc_bg_width, desc_bg_height))
-                desc_bg.fill(WHITE)
-                desc_bg.set_alpha(200) # 设置半透明
-                self.screen.blit(desc_bg, (desc_text_rect.left - 5, desc_text_rect.top - 2))
-                self.screen.blit(desc_text_surface, desc_text_rect)
+                desc_bg = self.layers.panel((desc_bg_width, desc_bg_height), WHITE, 200) # 设置半透明
+                surface.blit(desc_bg, (desc_text_rect.left - 5, desc_text_rect.top - 2))
+                surface.blit(desc_text_surface, desc_text_rect)
                 line_y_offset += font_small.get_height() # 每行向下偏移字体高度
 
-    def draw_buff_selection(self):
+    def draw_battle(self):
+        # 绘制玩家属性
+        self.player.draw(self.screen)
+        self.player.draw_health_bar(self.screen, *self.layout.player_health_bar)
+        
+        # 绘制怪物
+        if self.rules.monsters is not None:
+            self.draw_wave()
+        elif self.monster:
+            rect = self.layout.monster_rect
+            self.monster.draw(self.screen, rect.x, rect.y)
+            # 绘制怪物血条
+            draw_monster_health_bar(self.screen, self.monster, self.layout.monster_health_bar())
+        
+        # 推荐事件
+        hint = self.recommended_event()
+        if hint is not None:
+            pygame.draw.rect(self.screen, HINT_COLOR, self.event_buttons[hint].inflate(2 * HINT_BORDER, 2 * HINT_BORDER),
+                             HINT_BORDER)
+        
+        # 显示回合信息
+        font_large = get_font(24)
+        font_small = get_font(14) # 用于说明文字的较小字体
+        turn_text = font_large.render("你的回合" if self.player_turn else "怪物回合", True, BLACK)
+        turn_bg = self.layers.panel((turn_text.get_width() + 20, turn_text.get_height() + 10), WHITE, 180)
+        self.screen.blit(turn_bg, (SCREEN_WIDTH//2 - turn_text.get_width()//2 - 10, 40))
+        self.screen.blit(turn_text, (SCREEN_WIDTH//2 - turn_text.get_width()//2, 50))
+
+        # 显示击败哥布林数量
+        defeated_text = font_small.render(f"已击败哥布林: {self.goblins_defeated}", True, BLACK)
+        defeated_bg = self.layers.panel((defeated_text.get_width() + 10, defeated_text.get_height() + 5), WHITE, 180)
+        self.screen.blit(defeated_bg, (SCREEN_WIDTH - defeated_text.get_width() - 20, 10))
+        self.screen.blit(defeated_text, (SCREEN_WIDTH - defeated_text.get_width() - 15, 12))
+
+        # 手牌，拖动中的卡牌高亮显示
+        for card, rect in zip(self.player_hand, self.layout.hand_rects):
+            card.draw(self.screen, rect.x, rect.y)
+
+        # 各事件一直选择下去的胜率
+        chances = self.win_chances()
+        if chances is not None:
+            for event_type, chance in zip(EVENT_TYPES, chances):
+                rect = self.layout.win_chance_rects[event_type]
+                chance_text = font_small.render(f"胜率 {chance:.1%}", True, BLACK)
+                chance_rect = chance_text.get_rect(center=rect.center)
+                chance_bg = self.layers.panel((chance_text.get_width() + 10, chance_text.get_height() + 4), WHITE, 200)
+                self.screen.blit(chance_bg, (chance_rect.left - 5, chance_rect.top - 2))
+                self.screen.blit(chance_text, chance_rect)
+
+    def draw_wave(self):
+        # 只绘制最前面的几只存活怪物，其余显示剩余数量
+        monsters = self.rules.monsters
+        alive = monsters.alive().nonzero()[0]
+        for i, rect in enumerate(self.layout.monster_rects[:len(alive)]):
+            monster = monsters.at(int(alive[i]))
+            draw_monster(self.screen, monster, rect.x, rect.y)
+            draw_monster_health_bar(self.screen, monster, self.layout.monster_health_bar(i))
+        if len(alive):
+            rect = self.layout.monster_rects[-1]
+            draw_text_with_outline(self.screen, f"剩余怪物: {len(alive)}", (rect.x, rect.bottom + 5), 20)
+
+    def bake_buff_selection(self, surface):
+        self.bake_background(surface, GAME_STATE['BUFF_SELECTION'])
         font = get_font(36)
         title = font.render("选择增益效果", True, BLACK)
         # 添加标题背景
-        title_bg = pygame.Surface((title.get_width() + 20, title.get_height() + 10))
-        title_bg.fill(WHITE)
-        title_bg.set_alpha(200)
-        self.screen.blit(title_bg, (SCREEN_WIDTH//2 - title.get_width()//2 - 10, 40))
-        self.screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
+        title_bg = self.layers.panel((title.get_width() + 20, title.get_height() + 10), WHITE, 200)
+        surface.blit(title_bg, (SCREEN_WIDTH//2 - title.get_width()//2 - 10, 40))
+        surface.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
         
         # 绘制增益卡牌
-        for i, card in enumerate(self.buff_cards):
+        font = get_font(20)
+        for card, rect in zip(self.buff_cards, self.layout.buff_rects):
             # 添加卡牌背景
-            card_bg = pygame.Surface((card.width, card.height))
-            card_bg.fill(WHITE)
-            card_bg.set_alpha(180)
-            self.screen.blit(card_bg, (50 + i * 250, 200))
+            card_bg = self.layers.panel(rect.size, WHITE, 180)
+            surface.blit(card_bg, rect.topleft)
             
             # 绘制卡牌信息
-            font = get_font(20)
             name_text = font.render(card.name, True, BLACK)
             effect_text = font.render(card.effect, True, BLACK)
             
-            self.screen.blit(name_text, (55 + i * 250, 205))
-            self.screen.blit(effect_text, (55 + i * 250, 230))
+            surface.blit(name_text, (rect.x + 5, rect.y + 5))
+            surface.blit(effect_text, (rect.x + 5, rect.y + 30))
             
             # 绘制提示文字
             hint_text = font.render("点击选择", True, BLACK)
-            self.screen.blit(hint_text, (55 + i * 250, 280))
+            surface.blit(hint_text, (rect.x + 5, rect.y + 80))
 
-    def draw_game_over(self):
+    def draw_buff_selection(self):
+        # 增益卡牌都在静态层中，只有刮刮卡随刮开而变化
+        self.scratch_card.draw(self.screen, self.rules.scratch_card_pending, self.rules.scratch_card_reward)
+
+    def bake_game_over(self, surface):
+        self.bake_background(surface, GAME_STATE['GAME_OVER'])
         font_large = get_font(48)
-        font_medium = get_font(30)
         font_small = get_font(24)
 
         text = font_large.render("游戏结束", True, RED)
         text_rect = text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 50))
-        self.screen.blit(text, text_rect)
+        surface.blit(text, text_rect)
+
+        # 绘制重新开始按钮
+        pygame.draw.rect(surface, GREEN, self.restart_button) # 绿色按钮
+        pygame.draw.rect(surface, BLACK, self.restart_button, 2) # 黑色边框
+        restart_text = font_small.render("重新开始", True, BLACK)
+        restart_text_rect = restart_text.get_rect(center=self.restart_button.center)
+        surface.blit(restart_text, restart_text_rect)
+
+    def draw_game_over(self):
+        font_medium = get_font(30)
 
         # 显示最终击败哥布林数量
         score_text = font_medium.render(f"最终击败哥布林: {self.goblins_defeated}", True, BLACK)
         score_rect = score_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 10))
         self.screen.blit(score_text, score_rect)
+        
+        if self.leaderboard is not None and self.current_character is not None:
+            self.draw_rankings()
 
-        # 绘制重新开始按钮
-        pygame.draw.rect(self.screen, GREEN, self.restart_button) # 绿色按钮
-        pygame.draw.rect(self.screen, BLACK, self.restart_button, 2) # 黑色边框
-        restart_text = font_small.render("重新开始", True, BLACK)
-        restart_text_rect = restart_text.get_rect(center=self.restart_button.center)
-        self.screen.blit(restart_text, restart_text_rect)
+    def draw_rankings(self):
+        # 当前角色的排行榜和个人最佳，数据来自内存缓存
+        leaderboard = self.leaderboard
+        character = self.current_character.name
+        font = get_font(20)
+        best = leaderboard.cache.personal_best(leaderboard.player, character, leaderboard.wave)
+        lines = [f"{character} 排行榜    个人最佳: {best if best is not None else '-'}"]
+        for rank, (name, kills, turns) in enumerate(leaderboard.cache.ranking(character, leaderboard.wave), 1):
+            lines.append(f"{rank}. {name}  击杀 {kills}  回合 {turns}")
+        panel = self.layers.panel(RANKINGS_RECT.size, WHITE, 180)
+        self.screen.blit(panel, RANKINGS_RECT.topleft)
+        y = RANKINGS_RECT.y + 5
+        for line in lines:
+            text = font.render(line, True, BLACK)
+            self.screen.blit(text, (RANKINGS_RECT.x + 10, y))
+            y += font.get_height() + 2
+
+    def is_animating(self):
+        # 有待结算的怪物回合、正在拖动卡牌、图片或胜率还在后台计算、刚收到输入时需要保持满帧率
+        if self.loader is not None and not self.loader.finished():
+            return True
+        if self.win_chance_future is not None and not self.win_chance_future.done():
+            return True
+        if self.game_state == GAME_STATE['BATTLE'] and (not self.player_turn or self.player.dragging_card):
+            return True
+        return pygame.time.get_ticks() < self.active_until
+
+    def wait_events(self):
+        # 只有拖动卡牌时才接收鼠标移动事件，静止画面上移动鼠标不会唤醒主循环
+        dragging = self.game_state == GAME_STATE['BATTLE'] and bool(self.player.dragging_card)
+        if dragging != self.tracking_motion:
+            self.tracking_motion = dragging
+            if dragging:
+                pygame.event.set_allowed(pygame.MOUSEMOTION)
+            else:
+                pygame.event.set_blocked(pygame.MOUSEMOTION)
+        if self.is_animating():
+            events = pygame.event.get()
+        else:
+            # 画面静止时阻塞等待输入，不占用CPU
+            event = pygame.event.wait(IDLE_TIMEOUT_MS)
+            if event.type == pygame.NOEVENT:
+                return []
+            events = [event] + pygame.event.get()
+        # 鼠标移动只在拖动卡牌时改变画面，其余情况下不保持满帧率
+        if any(event.type != pygame.MOUSEMOTION or dragging for event in events):
+            self.active_until = pygame.time.get_ticks() + ACTIVE_WINDOW_MS
+        return coalesce_motion(events)
+
+    def screen_assets(self):
+        # 每个界面用到的图片：状态 -> [(路径, 尺寸)]
+        screens = {state: [self.backgrounds.entries[key]] for state, key in BACKGROUND_KEYS.items()}
+        screens[GAME_STATE['SELECT_CHARACTER']] += [(character.image_path, CHARACTER_SIZE)
+                                                    for character in self.characters]
+        screens[GAME_STATE['BATTLE']].append((monster_image_path(GOBLIN_NAME), MONSTER_SIZE))
+        return screens
+
+    def start_loading(self):
+        # 所有界面的图片交给线程池解码，当前界面的最先提交；每个界面的图片齐了就可以显示和操作
+        self.loader = AssetLoader(ASSETS)
+        screens = self.screen_assets()
+        for state in sorted(screens, key=lambda state: state != self.game_state):
+            self.loader.request(state, screens[state])
+
+    def screen_ready(self):
+        return self.loader is None or self.loader.ready(self.game_state)
+
+    def warm_assets(self):
+        # 首帧显示后再加载图片以外的资源；图片由后台线程加载，战斗中不再读盘
+        if self.leaderboard is not None:
+            self.leaderboard.load()
+        from concurrent.futures import ThreadPoolExecutor
+        from solver import PolicyTables
+        import outcomes
+        self.policies = PolicyTables()
+        self.outcomes = outcomes
+        self.outcome_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='win-chance')
+
+    def recommended_event(self):
+        # 玩家回合中按最优策略表查当前状态的推荐事件，查表只是一次内存映射读取
+        if (self.policies is None or self.game_state != GAME_STATE['BATTLE'] or not self.player_turn
+                or self.rules.monsters is not None or not self.monster):
+            return None
+        return self.policies.lookup(self.player, self.monster, self.goblins_defeated)
+
+    def update_win_chances(self):
+        # 玩家回合的状态变化时把五种事件的胜率计算（几毫秒）交给后台线程，不占用帧时间
+        key = None
+        if (self.game_state == GAME_STATE['BATTLE'] and self.player_turn and self.rules.monsters is None
+                and self.monster):
+            key = self.outcomes.live_state(self.player, self.monster)
+        if key != self.win_chance_key:
+            self.win_chance_key = key
+            self.win_chance_future = None
+            if key is not None:
+                self.win_chance_future = self.outcome_worker.submit(self.outcomes.win_chances, key)
+
+    def win_chances(self):
+        # 从当前状态开始一直选择同一事件的胜率；后台线程算完之前不显示，结果按状态缓存
+        future = self.win_chance_future
+        if future is None or not future.done():
+            return None
+        return future.result()
 
     def run(self):
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(ALLOWED_EVENTS)
+        self.active_until = 0
+        self.tracking_motion = True
+        
+        # 先开始后台加载图片并显示进度界面，再预热其余资源
+        self.start_loading()
+        self.draw()
+        STARTUP.mark('first_frame')
+        self.warm_assets()
+        STARTUP.mark('warm_assets')
+        if self.startup_report:
+            print(STARTUP.report())
+        
         while self.running:
-            self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(FPS)
+            if self.profiler is None:
+                self.handle_events(self.wait_events())
+                self.update()
+                self.draw()
+            else:
+                self.profile_frame(self.profiler)
+            if self.is_animating():
+                self.clock.tick(FPS)
+
+    def profile_frame(self, profiler):
+        # 等待输入的时间不算在帧耗时内
+        events = self.wait_events()
+        start = profiler.begin_frame()
+        self.handle_events(events)
+        start = profiler.add('events', start)
+        self.update()
+        start = profiler.add('update', start)
+        self.draw()
+        profiler.add('draw', start)
+        profiler.end_frame(self.game_state)
+
+def coalesce_motion(events):
+    # 同一批事件中只保留最后一个鼠标移动事件
+    last_motion = None
+    for i, event in enumerate(events):
+        if event.type == pygame.MOUSEMOTION:
+            last_motion = i
+    if last_motion is None:
+        return events
+    return [event for i, event in enumerate(events) if event.type != pygame.MOUSEMOTION or i == last_motion]
+
+def parse_args(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="卡牌冒险")
+    parser.add_argument('--full-redraw', action='store_true', help="每帧整屏重绘（脏矩形渲染的备用路径）")
+    parser.add_argument('--seed', type=int, default=None, help="随机种子")
+    parser.add_argument('--record', metavar='PATH', help="录制本次游戏的操作，退出时写入文件")
+    parser.add_argument('--startup-report', action='store_true', help="首帧显示后输出启动各阶段耗时")
+    parser.add_argument('--wave', type=int, default=DEFAULT_WAVE_SIZE, help="每场战斗同时出现的怪物数量")
+    parser.add_argument('--snapshot', metavar='PATH', help="启动时从快照恢复，并在每个回合边界保存快照")
+    parser.add_argument('--profile', action='store_true', help="开启逐帧性能分析并显示浮层（运行中按F3切换）")
+    parser.add_argument('--profile-csv', metavar='PATH', help="退出时把逐帧性能数据写入CSV")
+    parser.add_argument('--leaderboard', metavar='PATH', default=None,
+                        help="排行榜数据库，默认为 data/leaderboard.db")
+    parser.add_argument('--no-leaderboard', action='store_true', help="不记录成绩")
+    parser.add_argument('--player', default=None, help="排行榜中的玩家名，默认为当前用户")
+    args = parser.parse_args(argv)
+    if args.snapshot and args.record:
+        # 录制从种子开始重放，无法从快照的中途状态开始
+        parser.error("--snapshot 不能与 --record 同时使用")
+    return args
+
+# 模块导入完成
+STARTUP = StartupTimer(IMPORT_START)
+STARTUP.mark('import')
 
 if __name__ == "__main__":
-    game = Game()
+    args = parse_args(sys.argv[1:])
+    recorder = None
+    if args.record:
+        from replay import SessionRecorder
+        recorder = SessionRecorder()
+    leaderboard_path = None
+    if not args.no_leaderboard:
+        from leaderboard import LEADERBOARD_PATH
+        leaderboard_path = args.leaderboard or LEADERBOARD_PATH
+    game = Game(render_mode='full' if args.full_redraw else 'dirty', seed=args.seed, recorder=recorder,
+                startup_report=args.startup_report, wave_size=args.wave, snapshot_path=args.snapshot,
+                profile=args.profile, profile_csv=args.profile_csv,
+                leaderboard_path=leaderboard_path, player_name=args.player)
     game.run()
+    game.close()
+    if recorder is not None:
+        recorder.save(args.record, game)
     pygame.quit()
     sys.exit() 
\ No newline at end of file
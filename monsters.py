@@ -0,0 +1,155 @@
+# 怪物群：按列存储（结构数组），伤害、范围攻击和怪物反击都用NumPy批量计算
+import numpy as np
+
+# 按列存储的字段，顺序也是快照中的列顺序
+COLUMNS = ('type_ids', 'health', 'max_health', 'attack', 'defense', 'frozen')
+
+
+class MonsterStore:
+    def __init__(self, capacity=16):
+        self.count = 0
+        self.types = []  # 类型序号 -> 怪物名称
+        self.type_ids = np.zeros(capacity, dtype=np.int16)
+        self.health = np.zeros(capacity, dtype=np.int64)
+        self.max_health = np.zeros(capacity, dtype=np.int64)
+        self.attack = np.zeros(capacity, dtype=np.int64)
+        self.defense = np.zeros(capacity, dtype=np.int64)
+        self.frozen = np.zeros(capacity, dtype=np.int8)  # 冰冻标记，由状态效果设置和清除
+        # 每次修改数值时递增，界面据此判断是否需要重绘
+        self.version = 0
+
+    def _reserve(self, size):
+        capacity = self.health.size
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name in COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            setattr(self, name, grown)
+
+    def spawn(self, name, health, attack, defense, count=1):
+        if name not in self.types:
+            self.types.append(name)
+        start = self.count
+        end = start + count
+        self._reserve(end)
+        self.type_ids[start:end] = self.types.index(name)
+        self.health[start:end] = health
+        self.max_health[start:end] = health
+        self.attack[start:end] = attack
+        self.defense[start:end] = defense
+        self.frozen[start:end] = 0
+        self.count = end
+        self.version += 1
+        return range(start, end)
+
+    def load(self, types, columns):
+        # 用整列数据替换当前怪物群，columns 按 COLUMNS 的顺序排列
+        count = len(columns[0])
+        self.count = 0
+        self._reserve(count)
+        for name, values in zip(COLUMNS, columns):
+            getattr(self, name)[:count] = values
+        self.types = list(types)
+        self.count = count
+        self.version += 1
+
+    def clear(self):
+        self.count = 0
+        self.version += 1
+
+    def name(self, index):
+        return self.types[self.type_ids[index]]
+
+    def at(self, index):
+        return MonsterRef(self, index)
+
+    def alive(self):
+        return self.health[:self.count] > 0
+
+    def alive_count(self):
+        return int(np.count_nonzero(self.alive()))
+
+    def all_dead(self):
+        return not self.alive().any()
+
+    def front(self):
+        # 最靠前的存活怪物，作为单体伤害的目标
+        alive = self.alive()
+        if not alive.any():
+            return None
+        return self.at(int(np.argmax(alive)))
+
+    def take_damage(self, index, damage):
+        actual_damage = max(1, damage - int(self.defense[index]))
+        self.health[index] = max(0, int(self.health[index]) - actual_damage)
+        self.version += 1
+        return actual_damage
+
+    def take_damage_all(self, damage):
+        # 范围伤害：对所有存活怪物分别套用 max(1, 伤害 - 防御)
+        n = self.count
+        alive = self.alive()
+        actual = np.maximum(1, damage - self.defense[:n]) * alive
+        health = self.health[:n]
+        np.maximum(health - actual, 0, out=health)
+        self.version += 1
+        return int(actual.sum())
+
+    def counter_attack(self, player, attackers=None):
+        # attackers 中（默认为存活的）未被冰冻的怪物一起反击
+        n = self.count
+        attackers = (self.alive() if attackers is None else attackers) & (self.frozen[:n] == 0)
+        damage = int((np.maximum(1, self.attack[:n] - player.defense) * attackers).sum())
+        player.health = max(0, player.health - damage)
+        return damage
+
+
+class MonsterRef:
+    # 指向怪物群中某一只怪物，提供与单个怪物相同的属性和方法
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def name(self):
+        return self.store.name(self.index)
+
+    @property
+    def health(self):
+        return int(self.store.health[self.index])
+
+    @property
+    def max_health(self):
+        return int(self.store.max_health[self.index])
+
+    @property
+    def attack(self):
+        return int(self.store.attack[self.index])
+
+    @property
+    def defense(self):
+        return int(self.store.defense[self.index])
+
+    @property
+    def frozen(self):
+        return bool(self.store.frozen[self.index])
+
+    @frozen.setter
+    def frozen(self, value):
+        self.store.frozen[self.index] = value
+        self.store.version += 1
+
+    def take_damage(self, damage):
+        return self.store.take_damage(self.index, damage)
+
+    def __eq__(self, other):
+        return isinstance(other, MonsterRef) and other.store is self.store and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
@@ -0,0 +1,143 @@
+# 向量化蒙特卡洛评估：用NumPy数组同时模拟大量独立跑局，比较五种事件策略
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from engine import (BUFF_DEFENSE, BUFF_HEAL, CHARACTERS, EVENT_TABLE, EVENT_TYPES,
+                    GOBLIN_ATTACK, GOBLIN_BASE_HEALTH, GOBLIN_DEFENSE, GOBLIN_HEALTH_STEP)
+
+
+def evaluate(health, defense, event_type, runs, rng, buff='heal', max_turns=100000):
+    # 每局的状态都是向量中的一个元素，每回合用一次向量化抽样决定所有局的结果
+    self_chance, self_damage, monster_damage = EVENT_TABLE[event_type]
+    monster_hit = max(1, monster_damage - GOBLIN_DEFENSE)
+
+    index = np.arange(runs)
+    player_hp = np.full(runs, health, dtype=np.int64)
+    player_def = np.full(runs, defense, dtype=np.int64)
+    monster_hp = np.full(runs, GOBLIN_BASE_HEALTH, dtype=np.int64)
+    kills = np.zeros(runs, dtype=np.int64)
+    battle_turns = np.zeros(runs, dtype=np.int64)
+
+    final_kills = np.zeros(runs, dtype=np.int64)
+    final_turns = np.zeros(runs, dtype=np.int64)
+    died = np.zeros(runs, dtype=bool)
+    turns_to_kill = []
+    deaths_by_level = []
+
+    turn = 0
+    while index.size and turn < max_turns:
+        turn += 1
+        battle_turns += 1
+
+        # 玩家回合：自身受伤或怪物受伤
+        if self_chance:
+            self_hit = rng.random(index.size) < self_chance
+            player_hp -= self_hit * self_damage
+            monster_hp -= ~self_hit * monster_hit
+        else:
+            monster_hp -= monster_hit
+        np.maximum(monster_hp, 0, out=monster_hp)
+
+        # 怪物反击，伤害至少为1
+        player_hp -= np.maximum(1, GOBLIN_ATTACK - player_def)
+        np.maximum(player_hp, 0, out=player_hp)
+
+        dead = player_hp <= 0
+        killed = ~dead & (monster_hp <= 0)
+
+        if killed.any():
+            turns_to_kill.append(battle_turns[killed])
+            kills[killed] += 1
+            battle_turns[killed] = 0
+            monster_hp[killed] = GOBLIN_BASE_HEALTH + kills[killed] * GOBLIN_HEALTH_STEP
+            if buff == 'heal':
+                player_hp[killed] = np.minimum(health, player_hp[killed] + BUFF_HEAL)
+            elif buff == 'defense':
+                player_def[killed] += BUFF_DEFENSE
+            # 攻击力不影响概率事件的伤害，攻击增益在这里无需处理
+
+        if dead.any():
+            finished = index[dead]
+            final_kills[finished] = kills[dead]
+            final_turns[finished] = turn
+            died[finished] = True
+            deaths_by_level.append(kills[dead])
+
+            # 只保留仍在进行的局，后续回合不再为已结束的局计算
+            alive = ~dead
+            index = index[alive]
+            player_hp = player_hp[alive]
+            player_def = player_def[alive]
+            monster_hp = monster_hp[alive]
+            kills = kills[alive]
+            battle_turns = battle_turns[alive]
+
+    # 达到回合上限仍存活的局
+    final_kills[index] = kills
+    final_turns[index] = turn
+
+    turns_to_kill = np.concatenate(turns_to_kill) if turns_to_kill else np.zeros(0, dtype=np.int64)
+    deaths_by_level = np.concatenate(deaths_by_level) if deaths_by_level else np.zeros(0, dtype=np.int64)
+    return summarize(final_kills, final_turns, died, turns_to_kill, deaths_by_level)
+
+
+def summarize(final_kills, final_turns, died, turns_to_kill, deaths_by_level):
+    kill_counts = np.bincount(final_kills)
+    # 第k只哥布林的死亡率：死在第k场战斗的局数 / 打到第k场战斗的局数
+    levels = kill_counts.size
+    deaths = np.bincount(deaths_by_level, minlength=levels)
+    reached = np.cumsum(kill_counts[::-1])[::-1]
+    death_rate = np.divide(deaths, reached, out=np.zeros(levels), where=reached > 0)
+    return {
+        'runs': int(final_kills.size),
+        'kill_counts': kill_counts,
+        'mean_kills': float(final_kills.mean()),
+        'mean_turns': float(final_turns.mean()),
+        'death_rate': float(died.mean()),
+        'death_rate_by_level': death_rate,
+        'turns_to_kill_mean': float(turns_to_kill.mean()) if turns_to_kill.size else 0.0,
+        'turns_to_kill_p50': float(np.percentile(turns_to_kill, 50)) if turns_to_kill.size else 0.0,
+        'turns_to_kill_p90': float(np.percentile(turns_to_kill, 90)) if turns_to_kill.size else 0.0,
+    }
+
+
+def evaluate_all(runs, seed=None, buff='heal', characters=CHARACTERS, event_types=EVENT_TYPES, max_turns=100000):
+    # 每个角色 × 每种策略独立模拟
+    rng = np.random.default_rng(seed)
+    results = {}
+    for name, health, attack, defense, description in characters:
+        for event_type in event_types:
+            results[(name, event_type)] = evaluate(health, defense, event_type, runs, rng, buff, max_turns)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="向量化蒙特卡洛策略评估")
+    parser.add_argument('--runs', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--buff', default='heal', choices=('attack', 'defense', 'heal'))
+    parser.add_argument('--character', action='append', choices=[stats[0] for stats in CHARACTERS])
+    parser.add_argument('--strategy', action='append', choices=EVENT_TYPES)
+    parser.add_argument('--max-turns', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    characters = [stats for stats in CHARACTERS if not args.character or stats[0] in args.character]
+    event_types = args.strategy or EVENT_TYPES
+
+    start = time.perf_counter()
+    results = evaluate_all(args.runs, args.seed, args.buff, characters, event_types, args.max_turns)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'角色':<4} {'策略':<8} {'平均击杀':>8} {'最多':>4} {'平均回合':>8} {'击杀回合p50':>10} {'p90':>6}")
+    for (name, event_type), result in results.items():
+        print(f"{name:<4} {event_type:<8} {result['mean_kills']:>10.2f} {result['kill_counts'].size - 1:>6}"
+              f" {result['mean_turns']:>10.1f} {result['turns_to_kill_p50']:>13.1f} {result['turns_to_kill_p90']:>8.1f}")
+    print(f"共 {len(results) * args.runs} 局，耗时 {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
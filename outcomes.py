@@ -0,0 +1,131 @@
+# 精确的战斗结果分布：固定策略下每回合只有"自身受伤"和"怪物受伤"两个分支，
+# 未分胜负的状态只由成功次数 k 决定，转移矩阵是双对角的带状矩阵，逐回合传播概率向量即可得到精确分布
+import argparse
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from engine import CHARACTERS, EVENT_TABLE, EVENT_TYPES, GOBLIN_DEFENSE, goblin_health
+from solver import monster_attack_damage
+
+# 未分胜负的概率低于该值时停止传播
+TOLERANCE = 1e-12
+MAX_TURNS = 100000
+
+
+class BattleOutcome:
+    __slots__ = ('win_probability', 'turns_to_kill', 'expected_hp', 'expected_hp_on_win', 'expected_turns_to_kill')
+
+    def __init__(self, win_probability, turns_to_kill, expected_hp):
+        self.win_probability = win_probability
+        # turns_to_kill[t - 1]：在第 t 回合击败怪物的概率
+        self.turns_to_kill = turns_to_kill
+        # 战斗结束时的期望剩余生命（战败记为0）
+        self.expected_hp = expected_hp
+        if win_probability > 0:
+            self.expected_hp_on_win = expected_hp / win_probability
+            turns = np.arange(1, turns_to_kill.size + 1)
+            self.expected_turns_to_kill = float(turns @ turns_to_kill) / win_probability
+        else:
+            self.expected_hp_on_win = 0.0
+            self.expected_turns_to_kill = 0.0
+
+
+@lru_cache(maxsize=4096)
+def battle_outcome(player_health, attack_damage, monster_health, event_type, frozen=False):
+    # 从 (玩家生命, 怪物生命, 是否冰冻) 出发一直选择 event_type 的结果分布；attack_damage 为怪物每次反击的伤害
+    # 与 GameRules.update 的顺序一致：怪物反击后先判定玩家死亡，再判定怪物死亡
+    self_chance, self_damage, monster_damage = EVENT_TABLE[event_type]
+    hit = max(1, monster_damage - GOBLIN_DEFENSE)
+    needed = -(-monster_health // hit)  # 击败怪物需要的成功次数
+
+    if not self_chance:
+        # 每回合必定命中，没有随机性：第 needed 回合击败怪物，或在此之前死亡
+        hp = player_health - (needed - (1 if frozen else 0)) * attack_damage
+        turns_to_kill = np.zeros(needed)
+        turns_to_kill[-1] = 1.0 if hp > 0 else 0.0
+        turns_to_kill.flags.writeable = False
+        return BattleOutcome(float(turns_to_kill[-1]), turns_to_kill, max(0, hp) * turns_to_kill[-1])
+
+    successes = np.arange(needed)
+    alive = np.zeros(needed)  # alive[k]：已成功 k 次且仍未分胜负的概率
+    alive[0] = 1.0
+    wins = []
+    expected_hp = 0.0
+    attacked = 0  # 怪物累计反击伤害
+    turn = 0
+    while turn < MAX_TURNS and alive.sum() > TOLERANCE:
+        turn += 1
+        # 冰冻的怪物跳过第一次反击
+        if not (frozen and turn == 1):
+            attacked += attack_damage
+        win = alive[-1] * (1 - self_chance)
+        moved = alive[:-1] * (1 - self_chance)
+        alive *= self_chance
+        alive[1:] += moved
+
+        # 本回合第 needed 次成功：玩家生命仍大于0才算胜利
+        hp = player_health - (turn - needed) * self_damage - attacked
+        if hp > 0:
+            wins.append(win)
+            expected_hp += win * hp
+        else:
+            wins.append(0.0)
+        # 之后每回合都成功也会在击败怪物前死亡的状态必然战败，不再传播（已死亡的状态也在其中）
+        best_hp = player_health - (turn - successes) * self_damage - attacked - (needed - successes) * attack_damage
+        alive[best_hp <= 0] = 0.0
+
+    turns_to_kill = np.array(wins)
+    turns_to_kill.flags.writeable = False  # 结果会被缓存共享
+    return BattleOutcome(float(turns_to_kill.sum()), turns_to_kill, expected_hp)
+
+
+@lru_cache(maxsize=None)
+def character_outcome(character, level, event_type):
+    # 满血角色面对第 level 只哥布林（level 为已击败数量）时的结果分布
+    stats = next((stats for stats in CHARACTERS if stats[0] == character), None)
+    if stats is None:
+        raise ValueError(f"未知角色: {character}")
+    _, health, _, defense, _ = stats
+    return battle_outcome(health, monster_attack_damage(defense), goblin_health(level), event_type)
+
+
+def live_state(player, monster):
+    # 决定战斗中途结果的全部状态：(当前生命, 怪物每次反击的伤害, 怪物当前生命, 是否冰冻)
+    return (player.health, monster_attack_damage(player.defense, monster.attack), monster.health,
+            bool(monster.frozen))
+
+
+def live_outcome(player, monster, event_type):
+    player_health, attack_damage, monster_health, frozen = live_state(player, monster)
+    return battle_outcome(player_health, attack_damage, monster_health, event_type, frozen)
+
+
+def win_chances(state):
+    # live_state 状态下一直选择每种事件的胜率（按 EVENT_TYPES 顺序）；只用传入的数值，可以在后台线程中计算
+    player_health, attack_damage, monster_health, frozen = state
+    return tuple(battle_outcome(player_health, attack_damage, monster_health, event_type, frozen).win_probability
+                 for event_type in EVENT_TYPES)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="精确计算固定策略下一场战斗的结果分布")
+    parser.add_argument('--character', default=CHARACTERS[0][0], choices=[stats[0] for stats in CHARACTERS])
+    parser.add_argument('--level', type=int, default=0, help="已击败的哥布林数量")
+    parser.add_argument('--policy', default=None, choices=EVENT_TYPES, help="只计算一种事件，默认全部")
+    args = parser.parse_args(argv)
+
+    print(f"角色: {args.character}  哥布林生命: {goblin_health(args.level)}")
+    for event_type in [args.policy] if args.policy else EVENT_TYPES:
+        start = time.perf_counter()
+        outcome = character_outcome(args.character, args.level, event_type)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{event_type:<8} 胜率 {outcome.win_probability:.6f}  平均击杀回合 {outcome.expected_turns_to_kill:7.1f}"
+              f"  期望剩余生命 {outcome.expected_hp:8.1f}  ({elapsed:.1f}ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
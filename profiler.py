@@ -0,0 +1,165 @@
+# 逐帧性能分析：各阶段耗时和每帧的表面创建、文字渲染次数写入固定大小的环形缓冲区
+import csv
+import time
+from array import array
+
+import pygame
+
+# 每帧记录的阶段耗时（秒）：draw 包含 draw_state（当前界面的 draw_* 方法）和 present（提交到屏幕）
+PHASES = ('events', 'update', 'draw', 'draw_state', 'present', 'frame')
+# 每帧计数：pygame.Surface 创建次数、font.render 调用次数
+COUNTERS = ('surfaces', 'font_renders')
+SURFACES = 0
+FONT_RENDERS = 1
+
+DEFAULT_CAPACITY = 3600  # 60帧/秒下约一分钟
+SUMMARY_INTERVAL = 0.5   # 浮层的统计值最多每隔这么多秒重新计算一次
+
+
+class CountingFont:
+    # 包装字体，统计 render 调用次数，其余属性转发给原字体
+    __slots__ = ('font', 'profiler')
+
+    def __init__(self, font, profiler):
+        self.font = font
+        self.profiler = profiler
+
+    def render(self, *args, **kwargs):
+        if self.profiler.counting:
+            self.profiler.counts[FONT_RENDERS] += 1
+        return self.font.render(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.font, name)
+
+
+def counting_surface_type(profiler):
+    class CountingSurface(pygame.Surface):
+        def __init__(self, *args, **kwargs):
+            if profiler.counting:
+                profiler.counts[SURFACES] += 1
+            super().__init__(*args, **kwargs)
+    return CountingSurface
+
+
+class FrameProfiler:
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.times = {phase: array('d', [0.0]) * capacity for phase in PHASES}
+        self.counters = {name: array('l', [0]) * capacity for name in COUNTERS}
+        self.states = array('b', [0]) * capacity
+        self.frames = 0  # 累计记录的帧数，环形缓冲区中保留最近 capacity 帧
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.counts = [0] * len(COUNTERS)
+        self.counting = True
+        self.frame_start = 0.0
+        self.excluded = []  # 本帧不计时的 (开始时间, 耗时)，例如性能浮层的绘制
+        self.cached_summary = None
+        self.summary_time = 0.0
+        self.fonts = None
+        self.original_surface = None
+
+    def install(self, fonts):
+        # 只有开启分析后才替换 pygame.Surface 和字体，关闭时没有任何额外开销
+        if self.original_surface is None:
+            self.original_surface = pygame.Surface
+            pygame.Surface = counting_surface_type(self)
+            self.fonts = fonts
+            fonts.instrument(lambda font: CountingFont(font, self))
+
+    def uninstall(self):
+        if self.original_surface is not None:
+            pygame.Surface = self.original_surface
+            self.original_surface = None
+            self.fonts.instrument(None)
+
+    def begin_frame(self):
+        current = self.current
+        for phase in PHASES:
+            current[phase] = 0.0
+        self.counts[SURFACES] = self.counts[FONT_RENDERS] = 0
+        self.excluded.clear()
+        self.frame_start = time.perf_counter()
+        return self.frame_start
+
+    def add(self, phase, start):
+        # 把从 start 到现在的耗时计入 phase，返回当前时间便于连续计时
+        now = time.perf_counter()
+        self.current[phase] += now - start - sum(elapsed for at, elapsed in self.excluded if at >= start)
+        return now
+
+    def exclude(self, start):
+        # 从 start 到现在的耗时不计入包含这段时间的阶段和整帧
+        self.excluded.append((start, time.perf_counter() - start))
+
+    def end_frame(self, state):
+        i = self.frames % self.capacity
+        current = self.current
+        current['frame'] = time.perf_counter() - self.frame_start - sum(elapsed for _, elapsed in self.excluded)
+        for phase in PHASES:
+            self.times[phase][i] = current[phase]
+        for name, count in zip(COUNTERS, self.counts):
+            self.counters[name][i] = count
+        self.states[i] = state
+        self.frames += 1
+
+    def recorded(self):
+        # 缓冲区中各帧的槽位，按时间从旧到新
+        count = min(self.frames, self.capacity)
+        return [j % self.capacity for j in range(self.frames - count, self.frames)]
+
+    def values(self, phase):
+        # 缓冲区未写满时只取已记录的部分；写满后顺序与统计无关，直接使用整列
+        column = self.times[phase]
+        return column if self.frames >= self.capacity else column[:self.frames]
+
+    def percentile(self, phase, q):
+        return self.percentiles(phase, (q,))[0]
+
+    def percentiles(self, phase, qs):
+        values = sorted(self.values(phase))
+        if not values:
+            return [0.0] * len(qs)
+        return [values[min(len(values) - 1, int(q * len(values)))] for q in qs]
+
+    def mean(self, phase):
+        values = self.values(phase)
+        if not values:
+            return 0.0
+        return sum(values) / len(values)
+
+    def last_counts(self):
+        if not self.frames:
+            return dict.fromkeys(COUNTERS, 0)
+        i = (self.frames - 1) % self.capacity
+        return {name: self.counters[name][i] for name in COUNTERS}
+
+    def summary(self):
+        p50, p99 = self.percentiles('frame', (0.5, 0.99))
+        summary = {'frames': self.frames, 'frame_p50_ms': p50 * 1000, 'frame_p99_ms': p99 * 1000}
+        for phase in PHASES:
+            summary[f'{phase}_mean_ms'] = self.mean(phase) * 1000
+        summary.update(self.last_counts())
+        return summary
+
+    def latest_summary(self, interval=SUMMARY_INTERVAL):
+        # 浮层每帧都要显示，分位数和平均值每隔 interval 秒才重新计算；帧数和本帧计数每次更新
+        now = time.perf_counter()
+        if self.cached_summary is None or now - self.summary_time >= interval:
+            self.cached_summary = self.summary()
+            self.summary_time = now
+        else:
+            self.cached_summary['frames'] = self.frames
+            self.cached_summary.update(self.last_counts())
+        return self.cached_summary
+
+    def write_csv(self, path, state_names=None):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'state'] + [f'{phase}_ms' for phase in PHASES] + list(COUNTERS))
+            first = self.frames - min(self.frames, self.capacity)
+            for frame, i in enumerate(self.recorded(), first):
+                state = self.states[i]
+                writer.writerow([frame, state_names.get(state, state) if state_names else state]
+                                + [f'{self.times[phase][i] * 1000:.3f}' for phase in PHASES]
+                                + [self.counters[name][i] for name in COUNTERS])
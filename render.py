@@ -0,0 +1,44 @@
+import pygame
+
+# 渲染模式：dirty 只更新变化的区域，full 每帧整屏重绘并 flip
+RENDER_MODES = ('dirty', 'full')
+
+_UNSET = object()
+
+
+class DirtyRegionTracker:
+    def __init__(self, screen_rect):
+        self.screen_rect = pygame.Rect(screen_rect)
+        # 区域名 -> (矩形, 计算该区域显示内容签名的函数)
+        self.regions = {}
+        self.signatures = {}
+        self.pending = []
+        self.full = True
+
+    def track(self, name, rect, signature):
+        self.regions[name] = (pygame.Rect(rect), signature)
+        self.signatures.pop(name, None)
+
+    def clear_regions(self):
+        self.regions.clear()
+        self.signatures.clear()
+
+    def mark(self, rect):
+        self.pending.append(pygame.Rect(rect))
+
+    def mark_all(self):
+        self.full = True
+
+    def collect(self):
+        # 比较每个区域的签名，签名变化的区域需要重绘
+        rects = self.pending
+        self.pending = []
+        for name, (rect, signature) in self.regions.items():
+            value = signature()
+            if self.signatures.get(name, _UNSET) != value:
+                self.signatures[name] = value
+                rects.append(rect)
+        if self.full:
+            self.full = False
+            return [self.screen_rect.copy()]
+        return [rect.clip(self.screen_rect) for rect in rects if rect.colliderect(self.screen_rect)]
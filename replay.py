@@ -0,0 +1,132 @@
+# 操作录制与无界面回放：记录种子和玩家操作，跳过渲染和帧率限制全速重跑
+import argparse
+import json
+import sys
+import time
+
+LOG_VERSION = 1
+
+# 每个操作编码为一个字符：角色序号用数字，事件/增益/刮刮卡/重新开始用字母，出牌用 c-g 表示第0-4张手牌
+EVENT_CODES = {'risk': 'r', 'balance': 'b', 'safe': 's', 'all_in': 'a', 'scratch': 'x'}
+BUFF_CODES = {'attack': 'A', 'defense': 'D', 'heal': 'H'}
+CARD_CODES = 'cdefg'
+SCRATCH_CARD_CODE = 'S'
+RESTART_CODE = 'R'
+EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+BUFF_NAMES = {code: name for name, code in BUFF_CODES.items()}
+
+
+def encode_action(action):
+    kind = action[0]
+    if kind == 'select':
+        if not 0 <= action[1] <= 9:
+            raise ValueError(f"角色序号超出范围: {action[1]}")
+        return str(action[1])
+    if kind == 'event':
+        return EVENT_CODES[action[1]]
+    if kind == 'card':
+        if not 0 <= action[1] < len(CARD_CODES):
+            raise ValueError(f"手牌序号超出范围: {action[1]}")
+        return CARD_CODES[action[1]]
+    if kind == 'buff':
+        return BUFF_CODES[action[1]]
+    if kind == 'scratch_card':
+        return SCRATCH_CARD_CODE
+    if kind == 'restart':
+        return RESTART_CODE
+    raise ValueError(f"无法录制的操作: {action}")
+
+
+def decode_action(code):
+    if code.isdigit():
+        return ('select', int(code))
+    if code in EVENT_NAMES:
+        return ('event', EVENT_NAMES[code])
+    if code in CARD_CODES:
+        return ('card', CARD_CODES.index(code))
+    if code in BUFF_NAMES:
+        return ('buff', BUFF_NAMES[code])
+    if code == SCRATCH_CARD_CODE:
+        return ('scratch_card',)
+    if code == RESTART_CODE:
+        return ('restart',)
+    raise ValueError(f"无法识别的操作编码: {code}")
+
+
+def game_result(game):
+    return {
+        'goblins_defeated': game.goblins_defeated,
+        'health': game.player.health if game.player else None,
+    }
+
+
+class SessionRecorder:
+    def __init__(self):
+        self.seed = None
+        self.wave_size = 1
+        self.codes = []
+
+    def start(self, seed, wave_size=1):
+        self.seed = seed
+        self.wave_size = wave_size
+        self.codes = []
+
+    def record(self, action):
+        self.codes.append(encode_action(action))
+
+    def to_dict(self, game=None):
+        session = {'version': LOG_VERSION, 'seed': self.seed, 'actions': ''.join(self.codes)}
+        if self.wave_size != 1:
+            session['wave'] = self.wave_size # 怪物群模式，单怪物时省略
+        if game is not None:
+            session['result'] = game_result(game)
+        return session
+
+    def save(self, path, game=None):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(game), f, ensure_ascii=False)
+            f.write('\n')
+
+
+def load_session(path):
+    with open(path, encoding='utf-8') as f:
+        session = json.load(f)
+    if session.get('version') != LOG_VERSION:
+        raise ValueError(f"不支持的录制版本: {session.get('version')}")
+    return session
+
+
+def replay_session(session):
+    # 按录制顺序执行操作，每个操作后调用一次 update，与实际游戏的帧顺序一致
+    from main import Game
+    game = Game(seed=session['seed'], headless=True, wave_size=session.get('wave', 1))
+    for code in session['actions']:
+        game.perform(decode_action(code))
+        game.update()
+    return game
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="回放录制的游戏，并检查结果是否与录制时一致")
+    parser.add_argument('logs', nargs='+', help="录制文件")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    start = time.perf_counter()
+    for path in args.logs:
+        session = load_session(path)
+        game = replay_session(session)
+        result = game_result(game)
+        expected = session.get('result')
+        if expected is not None and expected != result:
+            failures += 1
+            print(f"不一致 {path}: 录制 {expected}，回放 {result}")
+        else:
+            print(f"通过 {path}: 击败哥布林 {result['goblins_defeated']}，生命 {result['health']}")
+    elapsed = time.perf_counter() - start
+    print(f"回放 {len(args.logs)} 个录制，失败 {failures} 个，耗时 {elapsed * 1000:.1f}ms")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
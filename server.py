@@ -0,0 +1,231 @@
+# 多局游戏服务器：一个 asyncio 进程托管多局无界面的规则核心，客户端通过本机 TCP 或 Unix 套接字收发 JSON 行
+#
+# 请求每行一个 JSON 对象，响应按请求顺序每行返回一个（请求中的 id 原样带回）：
+#   {"op": "new", "seed": 1, "wave": 1}                        -> {"ok": true, "session": 1, "state": {...}}
+#   {"op": "act", "session": 1, "action": ["event", "safe"]}   -> {"ok": true, "state": {...}}
+#   {"op": "act", "session": 1, "action": ["card", 0]}         -> 打出第0张手牌
+#   {"op": "act", "session": 1, "action": ["scratch_card"]}    -> 战斗胜利后刮开刮刮卡（状态中 scratch_card 为 true 时）
+#   {"op": "state", "session": 1}                              -> {"ok": true, "state": {...}}
+#   {"op": "close", "session": 1}                              -> {"ok": true}
+# 出错时返回 {"ok": false, "error": "..."}，连接保持打开
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+
+from engine import DEFAULT_WAVE_SIZE, GAME_STATE, GameRules
+
+DEFAULT_HOST = '127.0.0.1'  # 只监听本机
+DEFAULT_PORT = 8765
+DEFAULT_IDLE_TIMEOUT = 300.0  # 秒，超过该时间没有请求的对局被回收
+DEFAULT_MAX_SESSIONS = 10000
+MAX_WAVE_SIZE = 64
+MAX_LINE = 4096  # 单行请求的最大字节数
+
+STATE_NAMES = {value: name for name, value in GAME_STATE.items()}
+
+
+def encode(response):
+    return (json.dumps(response, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+class Session:
+    # 每局只保存规则核心和最后活动时间；规则核心使用无界面的玩家和怪物类型
+    __slots__ = ('rules', 'last_seen')
+
+    def __init__(self, rules, now):
+        self.rules = rules
+        self.last_seen = now
+
+
+def describe(rules):
+    # 返回给客户端的状态：只包含界面需要显示的数值
+    state = {
+        'state': STATE_NAMES[rules.game_state],
+        'player_turn': rules.player_turn,
+        'round': rules.battle_round,
+        'goblins_defeated': rules.goblins_defeated,
+        'scratch_card': rules.scratch_card_pending,
+        'scratch_card_reward': rules.scratch_card_reward.card_id if rules.scratch_card_reward else None,
+        'player': None,
+        'monster': None,
+    }
+    player = rules.player
+    if player is not None:
+        state['player'] = {'health': player.health, 'max_health': player.max_health,
+                           'attack': player.attack, 'defense': player.defense,
+                           'hand': [card.definition.card_id for card in player.deck.hand]}
+    monster = rules.monster
+    if monster is not None:
+        state['monster'] = {'health': monster.health, 'max_health': monster.max_health,
+                            'attack': monster.attack, 'defense': monster.defense, 'frozen': bool(monster.frozen)}
+        if rules.monsters is not None:
+            state['monsters_alive'] = rules.monsters.alive_count()
+    return state
+
+
+class GameServer:
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT, max_sessions=DEFAULT_MAX_SESSIONS):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.server = None
+        self.evictor = None
+        # 统计
+        self.requests = 0
+        self.evicted = 0
+
+    def create(self, seed=None, wave=DEFAULT_WAVE_SIZE):
+        if len(self.sessions) >= self.max_sessions:
+            # 先回收空闲的对局，仍然满时拒绝
+            self.evict_idle()
+            if len(self.sessions) >= self.max_sessions:
+                raise ValueError("对局数量已达上限")
+        if type(wave) is not int or not 1 <= wave <= MAX_WAVE_SIZE:
+            raise ValueError(f"怪物数量必须在1到{MAX_WAVE_SIZE}之间: {wave}")
+        rng = random.Random(seed) if seed is not None else random.Random()
+        session_id = next(self.ids)
+        self.sessions[session_id] = Session(GameRules(rng=rng, wave_size=wave), time.monotonic())
+        return session_id
+
+    def session(self, session_id):
+        session = self.sessions.get(session_id) if type(session_id) is int else None
+        if session is None:
+            raise ValueError(f"未知的对局: {session_id}")
+        session.last_seen = time.monotonic()
+        return session
+
+    def dispatch(self, request):
+        # 处理一个请求并返回响应；规则结算只需几微秒，直接在事件循环中执行
+        if not isinstance(request, dict):
+            raise ValueError("请求必须是JSON对象")
+        op = request.get('op')
+        if op == 'new':
+            session_id = self.create(request.get('seed'), request.get('wave', DEFAULT_WAVE_SIZE))
+            return {'ok': True, 'session': session_id, 'state': describe(self.sessions[session_id].rules)}
+        if op == 'act':
+            rules = self.session(request.get('session')).rules
+            action = request.get('action')
+            if not isinstance(action, list):
+                raise ValueError(f"操作必须是数组: {action}")
+            action = tuple(action)
+            rules.validate_action(action)
+            # 一次操作即一个完整回合：玩家行动后立即结算怪物回合
+            rules.apply_action(action)
+            rules.update()
+            return {'ok': True, 'state': describe(rules)}
+        if op == 'state':
+            return {'ok': True, 'state': describe(self.session(request.get('session')).rules)}
+        if op == 'close':
+            session_id = request.get('session')
+            self.session(session_id)
+            del self.sessions[session_id]
+            return {'ok': True}
+        raise ValueError(f"未知的请求: {op}")
+
+    def handle_line(self, line):
+        self.requests += 1
+        request_id = None
+        try:
+            request = json.loads(line)
+            if isinstance(request, dict):
+                request_id = request.get('id')
+            response = self.dispatch(request)
+        except (ValueError, TypeError) as e:  # json.JSONDecodeError 也是 ValueError
+            response = {'ok': False, 'error': str(e)}
+        except RecursionError:
+            # 不到 MAX_LINE 的请求也可能嵌套几千层，解析时超出递归深度
+            response = {'ok': False, 'error': "请求嵌套过深"}
+        if request_id is not None:
+            response['id'] = request_id
+        return encode(response)
+
+    async def handle_client(self, reader, writer):
+        # 每个连接按顺序处理请求：等写缓冲区排空后才读下一行，客户端读得慢时服务器也停止读取（背压）
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # 超长的行：回复错误后断开，不再解析这个连接的后续数据
+                    writer.write(encode({'ok': False, 'error': "请求过长"}))
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    writer.write(self.handle_line(line))
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def evict_idle(self, now=None):
+        # 回收超过空闲时间的对局，返回回收的数量
+        now = time.monotonic() if now is None else now
+        deadline = now - self.idle_timeout
+        idle = [session_id for session_id, session in self.sessions.items() if session.last_seen < deadline]
+        for session_id in idle:
+            del self.sessions[session_id]
+        self.evicted += len(idle)
+        return len(idle)
+
+    async def evict_loop(self):
+        while True:
+            await asyncio.sleep(max(0.1, self.idle_timeout / 4))
+            self.evict_idle()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle_client, path, limit=MAX_LINE)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE)
+        self.evictor = asyncio.create_task(self.evict_loop())
+        return self.server
+
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    async def close(self):
+        if self.evictor is not None:
+            self.evictor.cancel()
+            self.evictor = None
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+
+async def serve(args):
+    server = GameServer(args.idle_timeout, args.max_sessions)
+    await server.start(args.host, args.port, args.unix)
+    print(f"游戏服务器已启动: {args.unix or '%s:%d' % server.address()[:2]}")
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+        print(f"处理请求 {server.requests} 个，回收空闲对局 {server.evicted} 个")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多局游戏服务器（JSON行协议）")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="监听地址，默认只监听本机")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', metavar='PATH', default=None, help="改为监听 Unix 套接字")
+    parser.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT, help="空闲对局的回收时间（秒）")
+    parser.add_argument('--max-sessions', type=int, default=DEFAULT_MAX_SESSIONS)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
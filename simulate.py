@@ -0,0 +1,179 @@
+# 无界面模拟器：用可替换的策略完整跑局，用于平衡性测试
+import argparse
+import random
+import sys
+import time
+
+from engine import CHARACTERS, EVENT_TYPES, GAME_STATE, GameRules
+from snapshot import fork_rules
+
+BATTLE = GAME_STATE['BATTLE']
+BUFF_SELECTION = GAME_STATE['BUFF_SELECTION']
+GAME_OVER = GAME_STATE['GAME_OVER']
+
+
+# 战斗策略：根据当前规则状态返回事件类型
+def fixed_policy(event_type):
+    def policy(rules):
+        return event_type
+    return policy
+
+
+def random_policy(rules):
+    return rules.rng.choice(EVENT_TYPES)
+
+
+def guide_policy(rules):
+    # README中的分阶段策略：前期稳健，中期稳健/均衡交替，后期血量充足时梭哈
+    player = rules.player
+    hp_ratio = player.health / player.max_health
+    if hp_ratio < 0.2:
+        return 'scratch'
+    if rules.goblins_defeated < 5:
+        return 'balance' if hp_ratio > 0.8 else 'safe'
+    if rules.goblins_defeated < 10:
+        return 'risk' if hp_ratio > 0.9 else ('balance' if hp_ratio > 0.6 else 'safe')
+    return 'all_in' if hp_ratio > 0.7 else 'safe'
+
+
+class OptimalPolicy:
+    # 查 solver.py 的最优策略表（没有生成的表在内存中求解一次）；怪物群模式下退回稳健型
+    def __init__(self, fallback='safe'):
+        self.fallback = fallback
+        self.tables = None
+
+    def __call__(self, rules):
+        if self.tables is None:
+            from solver import PolicyTables
+            self.tables = PolicyTables(solve_missing=True)
+        if rules.monsters is not None:
+            return self.fallback
+        return self.tables.lookup(rules.player, rules.monster, rules.goblins_defeated) or self.fallback
+
+
+POLICIES = {event_type: fixed_policy(event_type) for event_type in EVENT_TYPES}
+POLICIES['random'] = random_policy
+POLICIES['guide'] = guide_policy
+POLICIES['optimal'] = OptimalPolicy()
+
+
+# 增益策略：击败怪物后选择的增益
+def fixed_buff(buff):
+    def policy(rules):
+        return buff
+    return policy
+
+
+def guide_buff(rules):
+    # 前期优先生命恢复，后期优先攻击
+    return 'heal' if rules.goblins_defeated < 10 else 'attack'
+
+
+BUFF_POLICIES = {buff: fixed_buff(buff) for buff in ('attack', 'defense', 'heal')}
+BUFF_POLICIES['guide'] = guide_buff
+
+
+class RunResult:
+    __slots__ = ('character', 'goblins_defeated', 'turns', 'health')
+
+    def __init__(self, character, goblins_defeated, turns, health):
+        self.character = character
+        self.goblins_defeated = goblins_defeated
+        self.turns = turns
+        self.health = health
+
+
+def play_turns(rules, policy, buff_policy, max_turns):
+    # 反复战斗和选择增益，直到死亡或达到回合上限，返回进行的回合数
+    turns = 0
+    while turns < max_turns:
+        state = rules.game_state
+        if state == BATTLE:
+            rules.trigger_event(policy(rules))
+            rules.update()
+            turns += 1
+        elif state == BUFF_SELECTION:
+            rules.choose_buff(buff_policy(rules))
+        else:
+            break
+    return turns
+
+
+def play_run(rules, character_index, policy, buff_policy, max_turns=1000000):
+    # 从选择角色开始跑完一局
+    rules.restart()
+    rules.select_character(character_index)
+    turns = play_turns(rules, policy, buff_policy, max_turns)
+    return RunResult(CHARACTERS[character_index][0], rules.goblins_defeated, turns, rules.player.health)
+
+
+def character_index(name):
+    for i, stats in enumerate(CHARACTERS):
+        if stats[0] == name:
+            return i
+    raise ValueError(f"未知角色: {name}")
+
+
+def simulate(runs, character, policy, buff_policy, seed=None, max_turns=1000000, wave_size=1):
+    rules = GameRules(rng=random.Random(seed), wave_size=wave_size)
+    index = character_index(character)
+    return [play_run(rules, index, policy, buff_policy, max_turns) for _ in range(runs)]
+
+
+def simulate_branches(runs, character, policy, buff_policy, branch_at, seed=None, max_turns=1000000, wave_size=1):
+    # 先跑到第 branch_at 回合作为检查点，再从检查点分叉出多局独立的后续，不必每局从头重跑
+    seeds = random.Random(seed)
+    rules = GameRules(rng=random.Random(seeds.randrange(2 ** 32)), wave_size=wave_size)
+    rules.select_character(character_index(character))
+    start_turns = play_turns(rules, policy, buff_policy, min(branch_at, max_turns))
+    results = []
+    for _ in range(runs):
+        branch = fork_rules(rules, random.Random(seeds.randrange(2 ** 32)))
+        turns = start_turns + play_turns(branch, policy, buff_policy, max_turns - start_turns)
+        results.append(RunResult(character, branch.goblins_defeated, turns, branch.player.health))
+    return results
+
+
+def summarize(results):
+    kills = sorted(result.goblins_defeated for result in results)
+    turns = sum(result.turns for result in results)
+    return {
+        'runs': len(results),
+        'mean_kills': sum(kills) / len(kills),
+        'median_kills': kills[len(kills) // 2],
+        'max_kills': kills[-1],
+        'turns': turns,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面跑局模拟")
+    parser.add_argument('--runs', type=int, default=100)
+    parser.add_argument('--character', default=CHARACTERS[0][0], choices=[stats[0] for stats in CHARACTERS])
+    parser.add_argument('--policy', default='safe', choices=sorted(POLICIES))
+    parser.add_argument('--buff', default='heal', choices=sorted(BUFF_POLICIES))
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--max-turns', type=int, default=1000000)
+    parser.add_argument('--wave', type=int, default=1, help="每场战斗同时出现的怪物数量")
+    parser.add_argument('--branch-at', type=int, default=None, metavar='TURN',
+                        help="先跑一局到指定回合，其余各局都从该检查点分叉")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.branch_at is not None:
+        results = simulate_branches(args.runs, args.character, POLICIES[args.policy], BUFF_POLICIES[args.buff],
+                                    args.branch_at, args.seed, args.max_turns, args.wave)
+    else:
+        results = simulate(args.runs, args.character, POLICIES[args.policy], BUFF_POLICIES[args.buff],
+                           args.seed, args.max_turns, args.wave)
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(results)
+    print(f"角色: {args.character}  策略: {args.policy}  增益: {args.buff}  局数: {summary['runs']}")
+    print(f"平均击杀: {summary['mean_kills']:.2f}  中位数: {summary['median_kills']}  最多: {summary['max_kills']}")
+    print(f"总回合: {summary['turns']}  耗时: {elapsed:.2f}s  ({summary['turns'] / max(elapsed, 1e-9):.0f} 回合/秒)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+# 游戏状态快照：版本化的二进制格式，后台线程原子写入，启动时恢复；模拟器用它从中途分叉
+import os
+import random
+import struct
+import threading
+
+from cards import default_registry
+from engine import EVENT_TYPES, GAME_STATE, STATUS_TYPES, GameRules
+
+SNAPSHOT_MAGIC = b'RCGS'
+SNAPSHOT_VERSION = 5
+
+# 头部：魔数, 版本, 游戏状态, 玩家回合, 刮刮卡未刮开, 战斗回合, 击杀数, 效果回合, 角色序号(-1为未选择), 怪物群数量,
+# 怪物数, 效果数
+HEADER = struct.Struct('<4sHBBBIIIbHIH')
+# 玩家：最大生命, 生命, 攻击, 防御, 金币, 幸运, 力量, 敏捷
+PLAYER = struct.Struct('<8i')
+PLAYER_FIELDS = ('max_health', 'health', 'attack', 'defense', 'gold', 'luck', 'strength', 'agility')
+# 本局统计：行动次数, 打出的卡牌数, 每种事件的选择次数（按 EVENT_TYPES 顺序）
+STATS = struct.Struct(f'<II{len(EVENT_TYPES)}I')
+# 牌库：卡牌ID表之后是抽牌堆, 手牌, 弃牌堆的卡牌数；再依次是每张卡牌在ID表中的序号，抽牌堆从底到顶
+# 保存ID而不是定义的顺序，data/cards.json 增删或调整卡牌后旧快照仍能载入
+DECK = struct.Struct('<HHH')
+# 怪物按列存储：(字段, struct格式)，与 monsters.COLUMNS 顺序一致
+MONSTER_COLUMNS = (('type_ids', 'h'), ('health', 'i'), ('max_health', 'i'),
+                   ('attack', 'i'), ('defense', 'i'), ('frozen', 'B'))
+# 状态效果：目标(-1为玩家，其余为怪物序号), 效果类型序号, 到期回合, 剩余次数, 层数；-1表示没有
+EFFECT = struct.Struct('<iBiiH')
+EFFECT_IDS = tuple(STATUS_TYPES)
+# 随机数生成器：Mersenne Twister 的 625 个状态字, 是否有缓存的高斯值, 高斯值
+RNG_STATE = struct.Struct('<625IBd')
+
+
+def monster_columns(rules):
+    # 单怪物和怪物群都写成同样的列
+    if rules.monsters is not None:
+        store = rules.monsters
+        return store.types, [getattr(store, name)[:store.count].tolist() for name, _ in MONSTER_COLUMNS]
+    monster = rules.monster
+    if monster is None:
+        return [], [[] for _ in MONSTER_COLUMNS]
+    return [monster.name], [[0], [monster.health], [monster.max_health],
+                            [monster.attack], [monster.defense], [int(monster.frozen)]]
+
+
+def deck_piles(player):
+    if player is None:
+        return [], [], []
+    deck = player.deck
+    return deck.draw_pile, deck.hand, deck.discard_pile
+
+
+def pack_names(names):
+    # 名称表：数量, 每个名称为长度+UTF-8字节
+    parts = [struct.pack('<H', len(names))]
+    for name in names:
+        encoded = name.encode('utf-8')
+        parts.append(struct.pack('<B', len(encoded)) + encoded)
+    return b''.join(parts)
+
+
+def unpack_names(data, offset):
+    (count,) = struct.unpack_from('<H', data, offset)
+    offset += 2
+    names = []
+    for _ in range(count):
+        (length,) = struct.unpack_from('<B', data, offset)
+        names.append(bytes(data[offset + 1:offset + 1 + length]).decode('utf-8'))
+        offset += 1 + length
+    return names, offset
+
+
+def target_code(rules, target):
+    if target is rules.player:
+        return -1
+    if rules.monsters is not None and getattr(target, 'store', None) is rules.monsters:
+        return target.index
+    if target is rules.monster:
+        return 0
+    raise ValueError(f"无法保存的效果目标: {target}")
+
+
+def dump_rules(rules):
+    names, columns = monster_columns(rules)
+    count = len(columns[0])
+    effects = rules.effects
+    character = rules.characters.index(rules.current_character) if rules.current_character is not None else -1
+    parts = [HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, rules.game_state, rules.player_turn,
+                         rules.scratch_card_pending, rules.battle_round, rules.goblins_defeated, effects.turn, character,
+                         rules.wave_size, count, len(effects.active))]
+    player = rules.player
+    parts.append(PLAYER.pack(*(getattr(player, name) for name in PLAYER_FIELDS)) if player else bytes(PLAYER.size))
+    parts.append(STATS.pack(rules.turns, rules.cards_played, *(rules.event_counts[name] for name in EVENT_TYPES)))
+    piles = deck_piles(player)
+    card_codes = {}
+    for pile in piles:
+        for card in pile:
+            card_codes.setdefault(card.definition.card_id, len(card_codes))
+    parts.append(pack_names(list(card_codes)))
+    parts.append(DECK.pack(*(len(pile) for pile in piles)))
+    for pile in piles:
+        parts.append(struct.pack(f'<{len(pile)}H', *(card_codes[card.definition.card_id] for card in pile)))
+    for (_, code), values in zip(MONSTER_COLUMNS, columns):
+        parts.append(struct.pack(f'<{count}{code}', *values))
+    parts.append(pack_names(names))
+    for (target, effect_id), effect in effects.active.items():
+        parts.append(EFFECT.pack(target_code(rules, target), EFFECT_IDS.index(effect_id),
+                                 -1 if effect.expires is None else effect.expires,
+                                 -1 if effect.charges is None else effect.charges, effect.stacks))
+    _, state, gauss = rules.rng.getstate()
+    parts.append(RNG_STATE.pack(*state, gauss is not None, gauss or 0.0))
+    return b''.join(parts)
+
+
+def checked(sequence, index, what):
+    # 快照中的序号都要在范围内，损坏或伪造的文件不能让恢复过程抛出 IndexError
+    if not 0 <= index < len(sequence):
+        raise ValueError(f"快照中的{what}序号超出范围: {index}")
+    return sequence[index]
+
+
+def load_rules(rules, data):
+    # 把快照恢复到一个配置相同的规则核心上；格式不对时抛出 ValueError
+    try:
+        return _load_rules(rules, memoryview(data))
+    except struct.error as e:
+        raise ValueError(f"快照数据不完整: {e}")
+
+
+def _load_rules(rules, data):
+    (magic, version, game_state, player_turn, scratch_card_pending, battle_round, goblins_defeated, turn, character,
+     wave_size, count, effect_count) = HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("不是游戏快照文件")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"不支持的快照版本: {version}")
+    if wave_size != rules.wave_size:
+        raise ValueError(f"快照的怪物数量({wave_size})与当前设置({rules.wave_size})不一致")
+    if game_state not in GAME_STATE.values():
+        raise ValueError(f"快照中的游戏状态无效: {game_state}")
+    if scratch_card_pending and game_state != GAME_STATE['BUFF_SELECTION']:
+        raise ValueError("快照中只有增益选择界面可以有未刮开的刮刮卡")
+    if count > wave_size:
+        raise ValueError(f"快照中的怪物数({count})超过怪物群数量({wave_size})")
+    if character >= 0:
+        checked(rules.characters, character, "角色")
+    elif character != -1 or game_state != GAME_STATE['SELECT_CHARACTER']:
+        raise ValueError(f"快照中的角色序号无效: {character}")
+    offset = HEADER.size
+
+    rules.restart()
+    rules.game_state = game_state
+    rules.player_turn = bool(player_turn)
+    rules.scratch_card_pending = bool(scratch_card_pending)
+    rules.battle_round = battle_round
+    rules.goblins_defeated = goblins_defeated
+    stats = PLAYER.unpack_from(data, offset)
+    offset += PLAYER.size
+    if character >= 0:
+        rules.current_character = rules.characters[character]
+        rules.player = rules.player_factory(rules.current_character, rules.rng)
+        for name, value in zip(PLAYER_FIELDS, stats):
+            setattr(rules.player, name, value)
+    rules.turns, rules.cards_played, *counts = STATS.unpack_from(data, offset)
+    rules.event_counts = dict(zip(EVENT_TYPES, counts))
+    offset += STATS.size
+    card_ids, offset = unpack_names(data, offset)
+    registry = default_registry()
+    definitions = []
+    for card_id in card_ids:
+        try:
+            definitions.append(registry.get(card_id))
+        except KeyError:
+            raise ValueError(f"快照中有未知的卡牌: {card_id}")
+    sizes = DECK.unpack_from(data, offset)
+    offset += DECK.size
+    piles = []
+    for size in sizes:
+        piles.append([checked(definitions, index, "卡牌") for index in struct.unpack_from(f'<{size}H', data, offset)])
+        offset += 2 * size
+    if rules.player is not None:
+        rules.player.deck.restore(*piles)
+    elif any(sizes):
+        raise ValueError("快照中没有玩家却有牌库")
+
+    columns = []
+    for _, code in MONSTER_COLUMNS:
+        column_format = f'<{count}{code}'
+        columns.append(struct.unpack_from(column_format, data, offset))
+        offset += struct.calcsize(column_format)
+    names, offset = unpack_names(data, offset)
+    for type_id in columns[0]:
+        checked(names, type_id, "怪物名称")
+
+    # 怪物：怪物群整列载入，单怪物用工厂重建
+    targets = {-1: rules.player}
+    if rules.monsters is not None:
+        rules.monsters.load(names, columns)
+        rules.wave_attackers = rules.monsters.alive()  # 快照只在回合边界保存
+        rules.monster = rules.monsters.front() or (rules.monsters.at(0) if count else None)
+        targets.update((i, rules.monsters.at(i)) for i in range(count))
+    elif count:
+        type_id, health, max_health, attack, defense, frozen = (column[0] for column in columns)
+        monster = rules.monster_factory(names[type_id], max_health, attack, defense)
+        monster.health = health
+        monster.frozen = bool(frozen)
+        rules.monster = monster
+        targets[0] = monster
+
+    # 状态效果：按剩余回合重新施加，施加时的回调会同步冰冻标记
+    rules.effects.turn = turn
+    for _ in range(effect_count):
+        target, effect_index, expires, charges, stacks = EFFECT.unpack_from(data, offset)
+        offset += EFFECT.size
+        if target not in targets or targets[target] is None:
+            raise ValueError(f"快照中的效果目标无效: {target}")
+        effect = rules.effects.apply(targets[target], checked(EFFECT_IDS, effect_index, "效果类型"),
+                                     duration=None if expires < 0 else expires - turn,
+                                     charges=None if charges < 0 else charges)
+        effect.stacks = stacks
+
+    *state, has_gauss, gauss = RNG_STATE.unpack_from(data, offset)
+    rules.rng.setstate((3, tuple(state), gauss if has_gauss else None))
+    return rules
+
+
+def fork_rules(rules, rng=None):
+    # 从当前状态分叉出一个独立的规则核心；传入 rng 时分叉后使用新的随机序列
+    clone = GameRules(rng=random.Random(), characters=rules.characters, monster_factory=rules.monster_factory,
+                      player_factory=rules.player_factory, wave_size=rules.wave_size)
+    load_rules(clone, dump_rules(rules))
+    if rng is not None:
+        clone.rng = rng
+        if clone.player is not None:
+            clone.player.deck.rng = rng # 牌库与规则核心共用随机数生成器
+    return clone
+
+
+def write_atomic(path, data):
+    # 先写临时文件再替换，任何时候读到的都是完整的快照
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def read_snapshot(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class SnapshotWriter:
+    # 后台写入线程：只保留最新的一份待写快照，主线程提交后立即返回
+    def __init__(self, path):
+        self.path = path
+        self.pending = None
+        self.closed = False
+        self.writes = 0
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name='snapshot-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, data):
+        with self.condition:
+            self.pending = data
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                data, self.pending = self.pending, None
+            if data is None:
+                return
+            try:
+                write_atomic(self.path, data)
+                self.writes += 1
+            except OSError as e:
+                print(f"无法保存快照: {self.path}: {e}")
+
+    def close(self):
+        # 写完最后一份快照后结束线程
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
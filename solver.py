@@ -0,0 +1,171 @@
+# 最优事件策略求解：一场战斗是以 (玩家生命, 怪物生命, 是否冰冻) 为状态的马尔可夫决策过程，
+# 按玩家生命从低到高逐行动态规划，得到每个状态的最优事件和战胜当前怪物的概率
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from engine import (BUFF_DEFENSE, CHARACTERS, EVENT_TABLE, EVENT_TYPES, GOBLIN_ATTACK, GOBLIN_DEFENSE,
+                    goblin_health)
+
+POLICY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'policies')
+MAX_PLAYER_HEALTH = max(stats[1] for stats in CHARACTERS)  # 治疗不会超过角色的最大生命
+DEFAULT_LEVELS = range(0, 11)
+
+# 胜率相差不超过该值的事件视为同样好，再比较战斗结束时的期望剩余生命
+TIE_TOLERANCE = 1e-12
+
+
+def monster_attack_damage(player_defense, monster_attack=GOBLIN_ATTACK):
+    return max(1, monster_attack - player_defense)
+
+
+def solve(monster_health, attack_damage, max_health=MAX_PLAYER_HEALTH, monster_defense=GOBLIN_DEFENSE):
+    # value[f, p, m]：冰冻标记f、玩家生命p、怪物生命m时战胜怪物的最大概率；policy 为对应的事件序号
+    # 胜率相同的事件中选择战斗结束时期望剩余生命 remaining[f, p, m]（战败记为0）最多的
+    # 与 GameRules.update 的顺序一致：玩家行动后怪物先反击（即使已被击败），再先判定玩家死亡
+    # 约定第0行为玩家已死（胜率0），p>0 的第0列为怪物已死且玩家存活（胜率1，剩余生命p）
+    shape = (2, max_health + 1, monster_health + 1)
+    value = np.zeros(shape)
+    remaining = np.zeros(shape)
+    policy = np.zeros(shape, dtype=np.uint8)
+    value[:, 1:, 0] = 1.0
+    remaining[:, 1:, 0] = np.arange(1, max_health + 1)
+    alive, alive_remaining = value[0], remaining[0]
+
+    # 每个事件：(自身受伤概率, 自身伤害, 怪物受伤后的生命下标)
+    monster_hp = np.arange(1, monster_health + 1)
+    actions = []
+    for event_type in EVENT_TYPES:
+        self_chance, self_damage, monster_damage = EVENT_TABLE[event_type]
+        hit = max(1, monster_damage - monster_defense)
+        actions.append((self_chance, self_damage, np.maximum(0, monster_hp - hit)))
+
+    q = np.empty((len(actions), monster_health))
+    h = np.empty((len(actions), monster_health))
+    columns = np.arange(monster_health)
+    for p in range(1, max_health + 1):
+        # 未冰冻时怪物反击后玩家生命严格减少，只依赖已经算好的低生命行；冰冻时依赖本行未冰冻的结果
+        for frozen, attack in ((0, attack_damage), (1, 0)):
+            hit_row = max(0, p - attack)
+            for k, (self_chance, self_damage, after_hit) in enumerate(actions):
+                q[k] = (1 - self_chance) * alive[hit_row, after_hit]
+                h[k] = (1 - self_chance) * alive_remaining[hit_row, after_hit]
+                if self_chance:
+                    self_row = max(0, p - self_damage - attack)
+                    q[k] += self_chance * alive[self_row, 1:]
+                    h[k] += self_chance * alive_remaining[self_row, 1:]
+            best = q.max(axis=0)
+            choice = np.argmax(np.where(q >= best - TIE_TOLERANCE, h, -1.0), axis=0)
+            policy[frozen, p, 1:] = choice
+            value[frozen, p, 1:] = q[choice, columns]
+            remaining[frozen, p, 1:] = h[choice, columns]
+    return policy, value, remaining
+
+
+def policy_path(directory, attack_damage, level):
+    return os.path.join(directory, f"policy_atk{attack_damage}_lvl{level}.npy")
+
+
+def reachable_attack_damages():
+    # 各角色从初始防御开始每次防御增益后，哥布林每次反击造成的伤害
+    damages = set()
+    for _, _, _, defense, _ in CHARACTERS:
+        while True:
+            damage = monster_attack_damage(defense)
+            damages.add(damage)
+            if damage == 1:
+                break
+            defense += BUFF_DEFENSE
+    return sorted(damages)
+
+
+def build_tables(directory=POLICY_DIR, levels=DEFAULT_LEVELS, attack_damages=None):
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for attack_damage in attack_damages or reachable_attack_damages():
+        for level in levels:
+            policy, _, _ = solve(goblin_health(level), attack_damage)
+            path = policy_path(directory, attack_damage, level)
+            np.save(path, policy)
+            paths.append(path)
+    return paths
+
+
+class PolicyTables:
+    # 按 (怪物反击伤害, 击杀数) 加载策略表；文件用内存映射打开，查表不需要读入整张表
+    def __init__(self, directory=POLICY_DIR, solve_missing=False):
+        self.directory = directory
+        self.solve_missing = solve_missing
+        self.tables = {}
+
+    def get(self, attack_damage, level):
+        key = (attack_damage, level)
+        if key in self.tables:
+            return self.tables[key]
+        table = None
+        path = policy_path(self.directory, attack_damage, level)
+        if os.path.exists(path):
+            try:
+                table = np.load(path, mmap_mode='r')
+            except (OSError, ValueError):
+                print(f"无法加载策略表: {path}")
+        if table is None and self.solve_missing:
+            table, _, _ = solve(goblin_health(level), attack_damage)
+        self.tables[key] = table
+        return table
+
+    def lookup(self, player, monster, level):
+        # 返回推荐的事件类型；没有对应的策略表或状态超出表的范围时返回None
+        table = self.get(monster_attack_damage(player.defense, monster.attack), level)
+        if table is None:
+            return None
+        frozen = 1 if monster.frozen else 0
+        if not (0 < player.health < table.shape[1] and 0 < monster.health < table.shape[2]):
+            return None
+        return EVENT_TYPES[table[frozen, player.health, monster.health]]
+
+
+def parse_levels(text):
+    start, _, end = text.partition('-')
+    return range(int(start), int(end or start) + 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="求解每个战斗状态的最优事件")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="生成策略表")
+    build.add_argument('--levels', default=f"{DEFAULT_LEVELS.start}-{DEFAULT_LEVELS.stop - 1}",
+                       help="击杀数范围，例如 0-10")
+    build.add_argument('--output', default=POLICY_DIR)
+    show = subparsers.add_parser('show', help="查询一个状态的最优事件和胜率")
+    show.add_argument('--character', default=CHARACTERS[0][0], choices=[stats[0] for stats in CHARACTERS])
+    show.add_argument('--level', type=int, default=0)
+    show.add_argument('--hp', type=int, default=None, help="玩家生命，默认为角色最大生命")
+    show.add_argument('--monster-hp', type=int, default=None, help="怪物生命，默认为满血")
+    show.add_argument('--frozen', action='store_true')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == 'build':
+        paths = build_tables(args.output, parse_levels(args.levels))
+        size = sum(os.path.getsize(path) for path in paths)
+        print(f"已生成 {len(paths)} 张策略表，共 {size / 1024 / 1024:.1f}MB，耗时 {time.perf_counter() - start:.1f}s")
+        return 0
+
+    stats = next(stats for stats in CHARACTERS if stats[0] == args.character)
+    monster_health = goblin_health(args.level)
+    hp = args.hp if args.hp is not None else stats[1]
+    monster_hp = args.monster_hp if args.monster_hp is not None else monster_health
+    policy, value, remaining = solve(monster_health, monster_attack_damage(stats[3]), max(hp, stats[1]))
+    state = (1 if args.frozen else 0, hp, monster_hp)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{args.character} 生命 {hp}，哥布林 {monster_hp}/{monster_health}：推荐 {EVENT_TYPES[policy[state]]}，"
+          f"胜率 {value[state]:.6f}，期望剩余生命 {remaining[state]:.1f}  (求解 {elapsed:.0f}ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import os
+import random
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pytest
+
+import snapshot
+from cards import default_registry
+from engine import GAME_STATE, GameRules
+
+
+def saved_rules(seed=1):
+    rules = GameRules(rng=random.Random(seed))
+    rules.select_character(0)
+    rules.trigger_event('safe')
+    rules.update()
+    return rules
+
+
+def with_header(data, **fields):
+    names = ('magic', 'version', 'game_state', 'player_turn', 'scratch_card_pending', 'battle_round',
+             'goblins_defeated', 'turn', 'character', 'wave_size', 'count', 'effect_count')
+    header = dict(zip(names, snapshot.HEADER.unpack_from(data, 0)))
+    header.update(fields)
+    return snapshot.HEADER.pack(*(header[name] for name in names)) + data[snapshot.HEADER.size:]
+
+
+def test_round_trip():
+    data = snapshot.dump_rules(saved_rules())
+    assert snapshot.dump_rules(snapshot.load_rules(GameRules(rng=random.Random()), data)) == data
+
+
+def test_deck_round_trip():
+    rules = saved_rules()
+    registry = default_registry()
+    for card_id in ('strike', 'thunder', 'strike', 'freeze', 'heavy_strike', 'strike'):
+        rules.player.deck.add(registry.get(card_id))
+    rules.player.deck.fill_hand()
+    data = snapshot.dump_rules(rules)
+    restored = snapshot.load_rules(GameRules(rng=random.Random()), data)
+    for old, new in zip(snapshot.deck_piles(rules.player), snapshot.deck_piles(restored.player)):
+        assert [card.definition for card in old] == [card.definition for card in new]
+
+
+def test_unknown_card_id():
+    rules = saved_rules()
+    rules.player.deck.add(default_registry().get('strike'))
+    data = snapshot.dump_rules(rules)
+    assert b'\x06strike' in data
+    data = data.replace(b'\x06strike', b'\x06strake')
+    with pytest.raises(ValueError, match='strake'):
+        snapshot.load_rules(GameRules(rng=random.Random()), data)
+
+
+def test_scratch_card_round_trip():
+    rules = saved_rules()
+    while rules.game_state == GAME_STATE['BATTLE']:
+        rules.trigger_event('safe')
+        rules.update()
+    assert rules.scratch_card_pending
+    restored = snapshot.load_rules(GameRules(rng=random.Random()), snapshot.dump_rules(rules))
+    assert restored.scratch_card_pending
+    assert restored.scratch_card().card_id == rules.scratch_card().card_id
+    restored = snapshot.load_rules(GameRules(rng=random.Random()), snapshot.dump_rules(rules))
+    assert not restored.scratch_card_pending
+    assert len(restored.player.deck.discard_pile) == 1
+
+
+@pytest.mark.parametrize('size', [0, 10, snapshot.HEADER.size, snapshot.HEADER.size + 20, -1])
+def test_truncated(size):
+    data = snapshot.dump_rules(saved_rules())
+    with pytest.raises(ValueError):
+        snapshot.load_rules(GameRules(rng=random.Random()), data[:size])
+
+
+@pytest.mark.parametrize('fields', [{'character': 5}, {'character': -2}, {'game_state': 9}, {'count': 7},
+                                    {'effect_count': 3}, {'scratch_card_pending': 1}])
+def test_out_of_range(fields):
+    data = with_header(snapshot.dump_rules(saved_rules()), **fields)
+    with pytest.raises(ValueError):
+        snapshot.load_rules(GameRules(rng=random.Random()), data)
+
+
+def test_restore_falls_back_to_new_game(tmp_path):
+    import main
+
+    path = tmp_path / 'save.bin'
+    path.write_bytes(with_header(snapshot.dump_rules(saved_rules()), character=5))
+    game = main.Game(headless=True, seed=1, snapshot_path=str(path))
+    try:
+        assert game.game_state == GAME_STATE['SELECT_CHARACTER']
+        assert game.player is None
+    finally:
+        game.close()
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+import pygame
+
+# 描边的四个偏移方向
+OUTLINE_OFFSETS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+
+class OutlinedTextCache:
+    def __init__(self, get_font, max_entries=256):
+        self.get_font = get_font
+        self.max_entries = max_entries
+        # (文字, 字号, 颜色, 描边颜色) -> 合成好的文字表面，按最近使用顺序排列
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text, size, color, outline_color):
+        key = (text, size, color, outline_color)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self._composite(text, size, color, outline_color)
+        self.entries[key] = surface
+        # 超出上限时淘汰最久未使用的文字，避免血量等变化的数值让缓存无限增长
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return surface
+
+    def _composite(self, text, size, color, outline_color):
+        font = self.get_font(size)
+        outline = font.render(text, True, outline_color)
+        text_surface = font.render(text, True, color)
+        # 四周各留1像素给描边
+        surface = pygame.Surface((text_surface.get_width() + 2, text_surface.get_height() + 2), pygame.SRCALPHA)
+        for dx, dy in OUTLINE_OFFSETS:
+            surface.blit(outline, (1 + dx, 1 + dy))
+        surface.blit(text_surface, (1, 1))
+        return surface
+
+    def draw(self, screen, text, pos, size, color, outline_color):
+        surface = self.render(text, size, color, outline_color)
+        # 合成表面带1像素边距，向左上偏移后文字位置与逐个描边绘制时一致
+        screen.blit(surface, (pos[0] - 1, pos[1] - 1))
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -0,0 +1,26 @@
+import time
+
+
+class StartupTimer:
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.marks = []
+
+    def mark(self, name):
+        # 同名阶段只记录第一次
+        if not any(mark == name for mark, _ in self.marks):
+            self.marks.append((name, time.perf_counter()))
+
+    def elapsed(self, name):
+        for mark, at in self.marks:
+            if mark == name:
+                return at - self.start
+        return None
+
+    def report(self):
+        lines = ["启动耗时:"]
+        previous = self.start
+        for name, at in self.marks:
+            lines.append(f"  {name:<12} +{(at - previous) * 1000:8.1f}ms  累计 {(at - self.start) * 1000:8.1f}ms")
+            previous = at
+        return "\n".join(lines)